@@ -5,38 +5,110 @@ os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
 from dotenv import load_dotenv
 load_dotenv()
 
+import re
 import requests
 import json
+import logging
+import logging.handlers
+import queue
+import orjson
+import numpy as np
+import time
 import matplotlib.pyplot as plt
 import io
 import base64
 import asyncio
+import heapq
 from fastapi import FastAPI, Request, Query, Form, HTTPException, BackgroundTasks
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from fastapi.responses import ORJSONResponse as FastAPIORJSONResponse
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 from starlette.middleware.sessions import SessionMiddleware
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from datetime import datetime, timedelta
-from email_alert import alert_service, send_heart_rate_alert
+from uuid import uuid4
+from zoneinfo import ZoneInfo
+from email_alert import alert_service, smtp_rate_limiter
 import uvicorn
 
 # Import MongoDB database models
 from database import (
-    init_database, close_database, 
+    init_database, close_database,
     UserModel, EmergencyContactModel, HealthAlertModel
 )
 
-app = FastAPI()
+# orjson-backed response model for the discovery client (defined alongside
+# the monitor's service cache, shared here so both parse Fit JSON the same)
+from health_monitor import OrjsonModel
+
+class ORJSONResponse(FastAPIORJSONResponse):
+    """orjson response that also handles numpy values and non-str keys
+
+    The debug payloads carry numpy scalars from the vectorized stats and
+    integer-keyed dicts; OPT_SERIALIZE_NUMPY/OPT_NON_STR_KEYS let orjson
+    encode those natively instead of failing over to Python-side casts.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+
+# orjson for every JSON body the framework serializes itself (dict returns,
+# error details, /openapi.json) - noticeably faster on the float/int arrays
+# the debug endpoints emit
+app = FastAPI(default_response_class=ORJSONResponse)
 app.add_middleware(SessionMiddleware, secret_key=os.urandom(24).hex())
 
 templates = Jinja2Templates(directory="templates")
 
-# Global 24/7 Health Monitoring System
+# Async Jinja2 environment for the chart pages: fit.html / vitals.html can
+# carry a year of labels+values, and generate_async() streams the rendered
+# HTML in chunks instead of buffering the whole page before the first byte.
+# Kept separate from `templates` so every other TemplateResponse (rendered
+# synchronously inside the event loop) is unaffected.
+_stream_env = Environment(
+    loader=FileSystemLoader("templates"),
+    autoescape=select_autoescape(['html']),
+    enable_async=True
+)
+
+def stream_template(template_name: str, context: dict) -> StreamingResponse:
+    """Render a template incrementally and stream the chunks to the client"""
+    template = _stream_env.get_template(template_name)
+    return StreamingResponse(template.generate_async(context), media_type="text/html")
+
+# Request-path logging goes through a queue: handlers run on a dedicated
+# listener thread, so emitting a log line costs the event loop one enqueue
+# instead of a synchronous stdout flush under the global I/O lock.
+# Per-point diagnostics stay at DEBUG so the hot loops pay nothing for them
+# in normal operation.
+logger = logging.getLogger("goatfit")
+logger.setLevel(logging.INFO)
+_log_queue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+logger.propagate = False
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+
+# Global 24/7 Health Monitoring System. Registration state lives on the
+# user document (monitoring_enabled) rather than a module dict, so it
+# survives restarts and is shared across uvicorn workers.
 global_monitoring_active = False
 global_monitoring_task = None
-monitored_users = {}  # Store user credentials and contacts for monitoring
+
+# Registration form contact fields, matched in C instead of
+# startswith+split+int per form key; count capped so an abusive payload
+# can't force thousands of form lookups
+_CONTACT_FIELD_RE = re.compile(r'^contact_(name|email|relationship)_(\d+)$')
+MAX_EMERGENCY_CONTACTS = 50
+ALERT_COOLDOWN_SECONDS = 30 * 60  # Don't re-alert the same user's contacts within this window
 
 # Google Fit Configuration
 GOOGLE_FIT_SCOPES = [
@@ -53,16 +125,464 @@ GOOGLE_FLOW = Flow.from_client_secrets_file(
     redirect_uri='http://localhost:8000/callback'
 )
 
+# Timezone objects built once at import - zoneinfo compiles the tz rules
+# on construction, so per-request pytz.timezone() calls were pure overhead
+LOCAL_TZ = ZoneInfo('Asia/Kolkata')  # Adjust to your timezone
+UTC_TZ = ZoneInfo('UTC')
+
+# Epoch reference for integer-only millis conversion. Subtracting from a
+# naive UTC datetime avoids datetime.timestamp()'s local-timezone logic
+# (which is both slower and wrong for the utcnow() values used here).
+EPOCH = datetime(1970, 1, 1)
+
+def _utc_ms(dt: datetime) -> int:
+    """Milliseconds since epoch for a naive UTC datetime"""
+    return int((dt - EPOCH).total_seconds() * 1000)
+
+# Credentials objects cached by access token. Credentials(**...)
+# re-validates scopes and re-parses token fields on every request;
+# reusing the instance also means a refreshed access token is shared
+# across requests instead of each one re-triggering refresh.
+_cred_cache = {}
+CRED_CACHE_TTL = 300  # seconds
+
+def get_credentials(cred_dict: dict) -> Credentials:
+    """Build (or reuse) a Credentials object for this session dict
+
+    The access token alone identifies the session's grant, so it serves as
+    the key directly - no need to hash the whole dict on every request.
+    """
+    cache_key = cred_dict.get('token')
+    cached = _cred_cache.get(cache_key) if cache_key else None
+    if cached and time.time() < cached[0] and not cached[1].expired:
+        return cached[1]
+    credentials = Credentials(**cred_dict)
+    if cache_key:
+        if len(_cred_cache) > 256:  # tokens rotate; don't grow forever
+            _cred_cache.clear()
+        _cred_cache[cache_key] = (time.time() + CRED_CACHE_TTL, credentials)
+    return credentials
+
+# Fitness service objects cached per access token. build() re-fetches and
+# re-parses the discovery document, which is tens of ms of pure overhead on
+# every /fit, /vitals and monitoring call for the same user.
+_service_cache = {}
+
+def get_fitness_service(credentials):
+    """Build (or reuse) the Fit discovery client for these credentials"""
+    cache_key = credentials.token or id(credentials)
+    service = _service_cache.get(cache_key)
+    if service is None:
+        service = build('fitness', 'v1', credentials=credentials,
+                        cache_discovery=False, static_discovery=True,
+                        model=OrjsonModel())
+        _service_cache[cache_key] = service
+        if len(_service_cache) > 256:  # tokens rotate; don't grow forever
+            _service_cache.clear()
+            _service_cache[cache_key] = service
+    return service
+
+def get_fit_service(request: Request):
+    """Resolve the session's Credentials and Fit client in one cached step
+
+    Both layers are cached (Credentials by session fingerprint, the
+    discovery client by access token), so a warm call is two dict hits.
+    """
+    credentials = get_credentials(request.session['google_credentials'])
+    return credentials, get_fitness_service(credentials)
+
+def _session_user(request: Request) -> dict:
+    """Read every session field the handlers use in one sweep
+
+    Handlers were probing the session four or five times each; one pass
+    gives them a plain dict and keeps the middleware path to a single
+    touch per request.
+    """
+    session = request.session
+    return {
+        "email": session.get('user_email', ''),
+        "name": session.get('user_name', 'GoatFit User'),
+        "user_id": session.get('user_id'),
+        "contacts": session.get('emergency_contacts', []),
+        "credentials": session.get('google_credentials'),
+    }
+
+def _fresh_http(shared_http):
+    """One-call transport reusing a service's credentials
+
+    httplib2 keeps per-host connection objects that are not thread-safe,
+    and the cached discovery services serve concurrent .execute() calls
+    from worker threads. Every threaded execute therefore runs over its
+    own transport instead of racing on the service's shared one.
+    """
+    credentials = getattr(shared_http, 'credentials', None)
+    if credentials is not None:
+        return AuthorizedHttp(credentials, http=httplib2.Http())
+    return httplib2.Http()
+
+def _execute_threadsafe(api_request):
+    """Blocking execute over a private transport (run via asyncio.to_thread)"""
+    return api_request.execute(http=_fresh_http(api_request.http))
+
+async def execute_api_request(api_request):
+    """Run a blocking googleapiclient request off the event loop
+
+    Any .execute() inside an async handler stalls the uvicorn worker for
+    the full Google round trip; routing it through a worker thread lets
+    the loop keep serving other requests. The per-call transport keeps
+    concurrent executes off the service's shared connections.
+    """
+    return await asyncio.to_thread(_execute_threadsafe, api_request)
+
+def _aggregate_sync(service, body: dict) -> dict:
+    """Blocking Google Fit aggregate call (run via asyncio.to_thread)"""
+    return _execute_threadsafe(service.users().dataset().aggregate(userId="me", body=body))
+
+async def fetch_aggregate_buckets(service, data_type: str, start_ms: int, end_ms: int,
+                                  bucket_ms: int = 86400000) -> list:
+    """Fetch one aggregate datatype in a worker thread; returns its buckets
+
+    Errors are caught here so one failed metric doesn't cancel the sibling
+    fetches when several run under asyncio.gather.
+    """
+    body = {
+        "aggregateBy": [{"dataTypeName": data_type}],
+        "bucketByTime": {"durationMillis": bucket_ms},
+        "startTimeMillis": start_ms,
+        "endTimeMillis": end_ms,
+    }
+    try:
+        dataset = await asyncio.to_thread(_aggregate_sync, service, body)
+        return dataset.get('bucket', ())
+    except Exception as e:
+        logger.error("Error fetching %s data: %s", data_type, e)
+        return []
+
+def _aggregate_batch_sync(service, data_types: list, start_ms: int, end_ms: int,
+                          bucket_ms: int) -> dict:
+    """Bundle several aggregate calls into one batch HTTP request
+
+    Google's batch endpoint packs the sub-requests into a single
+    multipart/mixed POST, so we pay one TLS handshake and one round trip
+    instead of one per datatype. Returns {data_type: buckets}; raises if
+    any sub-request failed so the caller can fall back.
+    """
+    results = {}
+    errors = []
+
+    def _collect(request_id, response, exception):
+        if exception is not None:
+            errors.append((request_id, exception))
+        else:
+            results[request_id] = response.get('bucket', ())
+
+    batch = service.new_batch_http_request(callback=_collect)
+    for data_type in data_types:
+        batch.add(
+            service.users().dataset().aggregate(userId="me", body={
+                "aggregateBy": [{"dataTypeName": data_type}],
+                "bucketByTime": {"durationMillis": bucket_ms},
+                "startTimeMillis": start_ms,
+                "endTimeMillis": end_ms,
+            }),
+            request_id=data_type,
+        )
+    batch.execute(http=_fresh_http(service._http))
+    if errors:
+        raise RuntimeError(f"Batch aggregate partial failure: {errors}")
+    return results
+
+async def fetch_aggregates_batched(service, data_types: list, start_ms: int, end_ms: int,
+                                   bucket_ms: int = 86400000) -> dict:
+    """Fetch several aggregate datatypes in one batched round trip
+
+    Falls back to per-datatype parallel fetches if the batch endpoint
+    errors (including partial failures), so callers always get a full
+    {data_type: buckets} mapping.
+    """
+    try:
+        return await asyncio.to_thread(
+            _aggregate_batch_sync, service, data_types, start_ms, end_ms, bucket_ms
+        )
+    except Exception as e:
+        logger.warning("Batch aggregate failed, falling back to parallel fetches: %s", e)
+        buckets = await asyncio.gather(*[
+            fetch_aggregate_buckets(service, dt, start_ms, end_ms, bucket_ms)
+            for dt in data_types
+        ])
+        return dict(zip(data_types, buckets))
+
+def _aggregate_fused_sync(service, data_types: list, start_ms: int, end_ms: int,
+                          bucket_ms: int) -> dict:
+    """One aggregate call covering every datatype (run via asyncio.to_thread)"""
+    return _execute_threadsafe(service.users().dataset().aggregate(userId="me", body={
+        "aggregateBy": [{"dataTypeName": dt} for dt in data_types],
+        "bucketByTime": {"durationMillis": bucket_ms},
+        "startTimeMillis": start_ms,
+        "endTimeMillis": end_ms,
+    }))
+
+# Shared keep-alive pool for direct Fit REST calls - the discovery client
+# allocates an httplib2.Http per call, while one requests.Session reuses
+# the TLS connection across every aggregate POST the process makes
+FIT_AGGREGATE_URL = "https://www.googleapis.com/fitness/v1/users/me/dataset:aggregate"
+_http_session = requests.Session()
+
+FIT_DATASET_URL = "https://www.googleapis.com/fitness/v1/users/me/dataSources/{source_id}/datasets/{dataset_id}"
+
+FIT_DATA_SOURCES_URL = "https://www.googleapis.com/fitness/v1/users/me/dataSources"
+
+def _data_sources_list_rest_sync(token: str) -> dict:
+    """GET the data source listing over the pooled session
+
+    Same keep-alive + orjson shortcut as the other REST helpers; the
+    listing is the third Fit endpoint the app actually hits.
+    """
+    response = _http_session.get(
+        FIT_DATA_SOURCES_URL,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=10,
+    )
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+def _dataset_get_rest_sync(token: str, source_id: str, dataset_id: str) -> dict:
+    """GET a raw dataset directly over the pooled session
+
+    Same shortcut as _aggregate_rest_sync for the other hot Fit endpoint:
+    keep-alive connection reuse plus orjson parsing instead of a fresh
+    httplib2.Http and stdlib json per call.
+    """
+    response = _http_session.get(
+        FIT_DATASET_URL.format(source_id=source_id, dataset_id=dataset_id),
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=10,
+    )
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+async def fetch_dataset(service, credentials, source_id: str, dataset_id: str) -> dict:
+    """datasets().get off the event loop, preferring the pooled REST path"""
+    if credentials is not None and credentials.token:
+        try:
+            return await asyncio.to_thread(
+                _dataset_get_rest_sync, credentials.token, source_id, dataset_id
+            )
+        except Exception as e:
+            logger.warning("REST dataset get failed, falling back to discovery client: %s", e)
+    return await execute_api_request(service.users().dataSources().datasets().get(
+        userId="me", dataSourceId=source_id, datasetId=dataset_id
+    ))
+
+def _aggregate_rest_sync(token: str, body: dict) -> dict:
+    """POST dataset:aggregate directly over the pooled session
+
+    Serializes the body and parses the response with orjson; skips the
+    discovery-client machinery entirely for this one well-known endpoint.
+    """
+    response = _http_session.post(
+        FIT_AGGREGATE_URL,
+        headers={"Authorization": f"Bearer {token}",
+                 "Content-Type": "application/json"},
+        data=orjson.dumps(body),
+        timeout=10,
+    )
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+async def fetch_aggregates_fused(service, data_types: list, start_ms: int, end_ms: int,
+                                 bucket_ms: int = 86400000, token: str = None) -> dict:
+    """Fetch several aggregate datatypes with a single aggregate call
+
+    The aggregate endpoint accepts multiple aggregateBy entries in one
+    body; bucket['dataset'][i] in the response corresponds to the i-th
+    requested datatype. One request, one JSON parse, one traversal -
+    versus one of each per metric. The fused response is split back into
+    per-datatype bucket lists so the existing per-metric walks don't
+    change. With a token the call goes straight over the pooled REST
+    session; falls back to the batched round trip on error.
+    """
+    try:
+        if token:
+            body = {
+                "aggregateBy": [{"dataTypeName": dt} for dt in data_types],
+                "bucketByTime": {"durationMillis": bucket_ms},
+                "startTimeMillis": start_ms,
+                "endTimeMillis": end_ms,
+            }
+            response = await asyncio.to_thread(_aggregate_rest_sync, token, body)
+        else:
+            response = await asyncio.to_thread(
+                _aggregate_fused_sync, service, data_types, start_ms, end_ms, bucket_ms
+            )
+        results = {dt: [] for dt in data_types}
+        for bucket in response.get('bucket', ()):
+            datasets = bucket.get('dataset', ())
+            for i, data_type in enumerate(data_types):
+                results[data_type].append({
+                    'startTimeMillis': bucket.get('startTimeMillis'),
+                    'endTimeMillis': bucket.get('endTimeMillis'),
+                    'dataset': [datasets[i]] if i < len(datasets) else [],
+                })
+        return results
+    except Exception as e:
+        logger.warning("Fused aggregate failed, falling back to batch request: %s", e)
+        return await fetch_aggregates_batched(service, data_types, start_ms, end_ms, bucket_ms)
+
+# Processed chart series cached per (user, page, view). Past daily buckets
+# never change, so re-fetching a whole year of aggregates on every render
+# is wasted I/O; short TTLs keep today's bucket acceptably fresh.
+_chart_cache = {}  # (user_email, page, view) -> (expires_at, context)
+CHART_CACHE_TTLS = {'weekly': 300, 'monthly': 900, 'yearly': 3600}
+
+def _chart_cache_get(cache_key):
+    """Return the cached template context or None if absent/expired"""
+    cached = _chart_cache.get(cache_key)
+    if cached and time.time() < cached[0]:
+        return cached[1]
+    return None
+
+_chart_locks = {}  # cache_key -> asyncio.Lock serializing builds per key
+
+def _chart_lock(cache_key) -> asyncio.Lock:
+    """Per-key lock so a burst of misses triggers a single upstream fetch"""
+    if len(_chart_locks) > 1024:  # bounded like the caches; worst case is one duplicate fetch
+        _chart_locks.clear()
+    return _chart_locks.setdefault(cache_key, asyncio.Lock())
+
+def _chart_cache_put(cache_key, view: str, context: dict):
+    """Store a template context (minus the request) under the view's TTL"""
+    payload = {k: v for k, v in context.items() if k != 'request'}
+    if len(_chart_cache) > 1024:  # largest payloads in the process; don't grow forever
+        _chart_cache.clear()
+    _chart_cache[cache_key] = (time.time() + CHART_CACHE_TTLS.get(view, 300), payload)
+
+# Date strings memoized per bucket start. All series in one request share
+# the same daily bucket boundaries, so after the first metric the strftime
+# work drops to a dict lookup for the rest.
+_bucket_date_cache = {}
+
+def _bucket_date(start_millis) -> str:
+    """'%Y-%m-%d' label for a bucket start (milliseconds since epoch)"""
+    date = _bucket_date_cache.get(start_millis)
+    if date is None:
+        date = datetime.utcfromtimestamp(int(start_millis) / 1000).strftime('%Y-%m-%d')
+        if len(_bucket_date_cache) > 4096:
+            _bucket_date_cache.clear()
+        _bucket_date_cache[start_millis] = date
+    return date
+
+def _prime_bucket_dates(buckets):
+    """Fill the date-label memo for all buckets in one vectorized pass
+
+    int64 millis -> datetime64[D] -> str runs as a single C loop, so a
+    yearly view converts its 365 labels without any per-bucket datetime
+    construction; _extract_series then only ever hits the memo.
+    """
+    missing = [b['startTimeMillis'] for b in buckets
+               if b['startTimeMillis'] not in _bucket_date_cache]
+    if not missing:
+        return
+    days = np.array(missing, dtype=np.int64) // 86400000
+    labels = days.astype('datetime64[D]').astype(str)
+    if len(_bucket_date_cache) + len(missing) > 4096:
+        _bucket_date_cache.clear()
+    _bucket_date_cache.update(zip(missing, labels))
+
+def _extract_series(buckets, key):
+    """Yield (date_str, value) pairs from aggregate buckets in one walk
+
+    Replaces the repeated bucket/dataset/point/value nests: the date string
+    is formatted once per bucket instead of once per value, and zip(*) at
+    the call site materializes both Chart.js arrays in C.
+    """
+    for bucket in buckets:
+        date = _bucket_date(bucket['startTimeMillis'])
+        for dataset in bucket.get('dataset', ()):
+            for point in dataset.get('point', ()):
+                for value in point.get('value', ()):
+                    if key in value:
+                        yield date, value[key]
+
+# isoformat is pure-Python string assembly; high-frequency samples cluster
+# into far fewer unique timestamps than points, so build each string once.
+# Separate caches because the debug summaries report UTC while the bucket
+# walks keep the host-local rendering they have always had.
+_iso_utc_cache = {}
+_iso_local_cache = {}
+ISO_CACHE_MAX = 10000
+
+def _iso_utc(sec: int) -> str:
+    """UTC isoformat for integer epoch seconds, cached"""
+    s = _iso_utc_cache.get(sec)
+    if s is None:
+        if len(_iso_utc_cache) > ISO_CACHE_MAX:
+            _iso_utc_cache.clear()
+        s = _iso_utc_cache.setdefault(sec, datetime.fromtimestamp(sec, tz=UTC_TZ).isoformat())
+    return s
+
+def _iso_local_ms(ms: int) -> str:
+    """Host-local isoformat for integer epoch milliseconds, cached"""
+    s = _iso_local_cache.get(ms)
+    if s is None:
+        if len(_iso_local_cache) > ISO_CACHE_MAX:
+            _iso_local_cache.clear()
+        s = _iso_local_cache.setdefault(ms, datetime.fromtimestamp(ms / 1000).isoformat())
+    return s
+
+def _extract_hr_points(buckets) -> tuple:
+    """Flatten aggregate buckets into parallel (times, values) lists
+
+    Structure-of-arrays form: the hot walk costs two bound-method appends
+    per reading, with the bucket timestamp formatted once per bucket. The
+    per-point dicts the debug endpoints serialize are only materialized
+    when the caller zips the columns back together.
+    """
+    times = []
+    values = []
+    _append_t = times.append
+    _append_v = values.append
+    for bucket in buckets:
+        bucket_iso = _iso_local_ms(int(bucket['startTimeMillis']))
+        for dataset in bucket.get('dataset', ()):
+            for point in dataset.get('point', ()):
+                for value in point.get('value', ()):
+                    if 'fpVal' in value:
+                        _append_t(bucket_iso)
+                        _append_v(round(value['fpVal'], 1))
+    return times, values
+
+def _extract_hr_points_np(buckets) -> tuple:
+    """Vectorized _extract_hr_points for point-heavy windows
+
+    One generator pass feeds a structured array and the rounding runs as a
+    whole-array numpy operation. Timestamps go through the same cached
+    host-local formatter as the plain path, so both extractors render
+    identically and the choice between them stays invisible to callers.
+    """
+    raw = (
+        (int(bucket['startTimeMillis']), value['fpVal'])
+        for bucket in buckets
+        for dataset in bucket.get('dataset', ())
+        for point in dataset.get('point', ())
+        for value in point.get('value', ())
+        if 'fpVal' in value
+    )
+    arr = np.fromiter(raw, dtype=[('t', 'i8'), ('v', 'f8')])
+    times = [_iso_local_ms(ms) for ms in arr['t'].tolist()]
+    values = np.round(arr['v'], 1).tolist()
+    return times, values
+
 @app.get('/')
-async def root(request: Request):
+def root(request: Request):
     return templates.TemplateResponse("home.html", {"request": request})
 
 @app.get('/home')
-async def home(request: Request):
+def home(request: Request):
     return templates.TemplateResponse("home.html", {"request": request})
 
 @app.get('/contact')
-async def contact(request: Request):
+def contact(request: Request):
     return templates.TemplateResponse("contact.html", {"request": request})
 
 @app.get('/debug')
@@ -80,9 +600,9 @@ async def debug_data(request: Request):
     
     if 'google_credentials' in request.session:
         try:
-            credentials = Credentials(**request.session['google_credentials'])
+            credentials = get_credentials(request.session['google_credentials'])
             debug_info["credentials"] = "Found"
-            service = build('fitness', 'v1', credentials=credentials)
+            service = get_fitness_service(credentials)
             
             now = datetime.utcnow()
             start_time = now - timedelta(days=7)
@@ -106,7 +626,7 @@ async def debug_data(request: Request):
     return debug_info
 
 @app.get('/test-charts', response_class=HTMLResponse)
-async def test_charts(request: Request):
+def test_charts(request: Request):
     """Test route with sample data to verify charts work"""
     # Sample data for testing
     sample_labels = ['2025-07-26', '2025-07-27', '2025-07-28', '2025-07-29', '2025-07-30', '2025-07-31', '2025-08-01']
@@ -123,7 +643,7 @@ async def test_charts(request: Request):
     })
 
 @app.get('/test-vitals', response_class=HTMLResponse)
-async def test_vitals(request: Request):
+def test_vitals(request: Request):
     """Test route with comprehensive sample vital data"""
     # Sample data for testing all vital signs
     sample_labels = ['2025-07-26', '2025-07-27', '2025-07-28', '2025-07-29', '2025-07-30', '2025-07-31', '2025-08-01']
@@ -144,10 +664,15 @@ async def test_vitals(request: Request):
 
 # Route: Authorize Google OAuth
 @app.get('/authorize/google')
-async def authorize_google():
+def authorize_google():
     auth_url, _ = GOOGLE_FLOW.authorization_url(prompt='consent')
     return RedirectResponse(url=auth_url)
 
+# Google user info cached per id_token subject - the email/name/id triple is
+# stable, so repeat sign-ins can skip the userinfo RPC entirely
+USERINFO_CACHE_TTL = 24 * 3600
+_userinfo_cache = {}  # sub -> (expires_at, (email, name, google_user_id))
+
 # Route: Google OAuth Callback
 @app.get('/callback')
 async def callback_google(request: Request):
@@ -167,31 +692,61 @@ async def callback_google(request: Request):
         user_email = 'unknown@user.com'
         user_name = 'GoatFit User'
         google_user_id = ''
-        
+
+        # Decode the ID token locally first - parsing the JWT is much cheaper
+        # than a userinfo RPC and gives us the stable subject for the cache.
+        # Signature verification is deliberately skipped: the token came
+        # straight from Google's token endpoint over TLS.
+        token_sub = ''
+        decoded_token = {}
         try:
-            # Try to get user info from Google
-            service = build('oauth2', 'v2', credentials=credentials)
-            user_info = service.userinfo().get().execute()
-            user_email = user_info.get('email', 'unknown@user.com')
-            user_name = user_info.get('name', 'GoatFit User')
-            google_user_id = user_info.get('id', '')
-            print(f"✅ User authenticated via Google: {user_email}")
-            
+            import jwt
+            if hasattr(credentials, 'id_token') and credentials.id_token:
+                decoded_token = jwt.decode(
+                    credentials.id_token,
+                    options={"verify_signature": False},
+                    algorithms=["RS256"],
+                )
+                token_sub = decoded_token.get('sub', '')
         except Exception as e:
-            print(f"⚠️ Could not get user info from Google API: {e}")
-            print("🔄 Proceeding with OAuth credentials only")
-            
-            # Extract email from OAuth token if possible
+            logger.warning("⚠️ Could not decode ID token: %s", e)
+
+        cached = _userinfo_cache.get(token_sub) if token_sub else None
+        if cached and time.time() < cached[0]:
+            user_email, user_name, google_user_id = cached[1]
+            logger.info("✅ User authenticated via Google (cached): %s", user_email)
+        else:
             try:
-                import jwt
-                # Decode the ID token if available (this is a fallback)
-                if hasattr(credentials, 'id_token') and credentials.id_token:
-                    decoded_token = jwt.decode(credentials.id_token, verify=False)
+                # Try to get user info from Google; the bundled discovery doc
+                # skips the discovery fetch the default build() would do
+                service = build('oauth2', 'v2', credentials=credentials,
+                                cache_discovery=False, static_discovery=True,
+                                model=OrjsonModel())
+                user_info = await execute_api_request(service.userinfo().get())
+                user_email = user_info.get('email', 'unknown@user.com')
+                user_name = user_info.get('name', 'GoatFit User')
+                google_user_id = user_info.get('id', '')
+                logger.info("✅ User authenticated via Google: %s", user_email)
+
+            except Exception as e:
+                logger.warning("⚠️ Could not get user info from Google API: %s", e)
+                logger.info("🔄 Proceeding with OAuth credentials only")
+
+                # Extract email from OAuth token if possible (this is a fallback)
+                try:
                     user_email = decoded_token.get('email', 'unknown@user.com')
                     user_name = decoded_token.get('name', 'GoatFit User')
                     google_user_id = decoded_token.get('sub', '')
-            except:
-                print("⚠️ Could not extract user info from token, using default values")
+                except:
+                    logger.warning("⚠️ Could not extract user info from token, using default values")
+
+            if token_sub and user_email != 'unknown@user.com':
+                if len(_userinfo_cache) > 1024:  # expired entries are never swept
+                    _userinfo_cache.clear()
+                _userinfo_cache[token_sub] = (
+                    time.time() + USERINFO_CACHE_TTL,
+                    (user_email, user_name, google_user_id)
+                )
         
         # Store user info in session
         request.session['user_email'] = user_email
@@ -202,19 +757,19 @@ async def callback_google(request: Request):
         existing_user = await UserModel.get_user_by_email(user_email)
         
         if not existing_user:
-            print(f"📝 New user detected: {user_email} - Redirecting to registration")
+            logger.info("📝 New user detected: %s - Redirecting to registration", user_email)
             return RedirectResponse(url='/register')
         else:
-            print(f"🔄 Existing user: {user_email} - Redirecting to dashboard")
+            logger.info("🔄 Existing user: %s - Redirecting to dashboard", user_email)
             request.session['user_id'] = existing_user['_id']
             return RedirectResponse(url='/index')
                 
     except Exception as e:
-        print(f"❌ OAuth callback error: {e}")
+        logger.error("❌ OAuth callback error: %s", e)
         return HTMLResponse(content=f"Error during Google OAuth callback: {e}", status_code=400)
 
 @app.get('/index')
-async def index():
+def index():
     return RedirectResponse(url='/fit?view=weekly')
 
 # =====================================================
@@ -231,11 +786,20 @@ async def register_form(request: Request):
     
     user_email = request.session.get('user_email', '')
     user_name = request.session.get('user_name', '')
-    
-    # Check if user already exists
-    existing_user = await UserModel.get_user_by_email(user_email)
-    if existing_user:
-        return RedirectResponse(url='/fit?view=weekly')
+
+    # Check if user already exists. The answer is cached in the session for
+    # a minute so repeated renders don't re-hit the database (email is
+    # uniquely indexed, but the round trip itself is the cost here).
+    checked_at = request.session.get('user_exists_checked_at', 0)
+    if time.time() - checked_at < 60:
+        if request.session.get('user_exists'):
+            return RedirectResponse(url='/fit?view=weekly')
+    else:
+        existing_user = await UserModel.get_user_by_email(user_email)
+        request.session['user_exists'] = existing_user is not None
+        request.session['user_exists_checked_at'] = time.time()
+        if existing_user:
+            return RedirectResponse(url='/fit?view=weekly')
     
     return templates.TemplateResponse("user_registration.html", {
         "request": request,
@@ -244,24 +808,34 @@ async def register_form(request: Request):
     })
 
 @app.post('/register')
-async def register_user(request: Request,
-                       name: str = Form(...),
-                       email: str = Form(...),
-                       phone: str = Form(""),
-                       age: str = Form(""),  # Changed to string to handle empty values
-                       high_hr_warning: int = Form(60),  # Changed to 60 for testing
-                       high_hr_critical: int = Form(60),  # Changed to 60 for testing
-                       low_hr_warning: int = Form(60),    # Changed to 60 for testing
-                       low_hr_critical: int = Form(60),   # Changed to 60 for testing
-                       enable_monitoring: bool = Form(False),
-                       data_consent: bool = Form(False)):
+async def register_user(request: Request):
     """Process user registration"""
-    
+
     try:
+        # Parse the multipart body exactly once - Form(...) dependencies plus
+        # a later request.form() call would parse (and allocate) it twice
+        form_data = await request.form()
+
+        name = form_data.get('name')
+        email = form_data.get('email')
+        phone = form_data.get('phone', "")
+        age = form_data.get('age', "")  # String to handle empty values
+        try:
+            high_hr_warning = int(form_data.get('high_hr_warning', 60))   # 60 for testing
+            high_hr_critical = int(form_data.get('high_hr_critical', 60))  # 60 for testing
+            low_hr_warning = int(form_data.get('low_hr_warning', 60))     # 60 for testing
+            low_hr_critical = int(form_data.get('low_hr_critical', 60))   # 60 for testing
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Heart rate thresholds must be valid numbers")
+        enable_monitoring = form_data.get('enable_monitoring') in ('on', 'true', 'True')
+        data_consent = form_data.get('data_consent') in ('on', 'true', 'True')
+
         # Validate required fields
+        if not name or not email:
+            raise HTTPException(status_code=400, detail="Name and email are required")
         if not enable_monitoring or not data_consent:
             raise HTTPException(status_code=400, detail="Monitoring and data consent are required")
-        
+
         # Convert age to integer, handle empty string
         user_age = None
         if age and age.strip():
@@ -293,47 +867,51 @@ async def register_user(request: Request,
         if not user_id:
             raise HTTPException(status_code=500, detail="Failed to create user")
         
-        # Store user ID in session
+        # Store user ID in session (and refresh the cached existence flag so
+        # a later GET /register doesn't show the form again)
         request.session['user_id'] = user_id
+        request.session['user_exists'] = True
+        request.session['user_exists_checked_at'] = time.time()
+
+        # Process emergency contacts (from the same parsed form): group the
+        # contact_*_N fields by index in one pass over the form instead of
+        # three formatted-key lookups per slot
+        contacts_by_idx = {}
+        for key, value in form_data.items():
+            m = _CONTACT_FIELD_RE.match(key)
+            if m and int(m.group(2)) < MAX_EMERGENCY_CONTACTS:
+                contacts_by_idx.setdefault(int(m.group(2)), {})[m.group(1)] = value
+
+        # Collect the valid contacts in submission order, then insert them
+        # in one round trip instead of one await per contact
+        contacts_to_insert = [
+            {
+                "name": contact['name'],
+                "email": contact['email'],
+                "relationship": contact.get('relationship', 'Other')
+            }
+            for _, contact in sorted(contacts_by_idx.items())
+            if contact.get('name') and contact.get('email')
+        ]
+
+        contact_ids = await EmergencyContactModel.add_contacts_bulk(user_id, contacts_to_insert)
+        contacts_added = len(contact_ids)
         
-        # Process emergency contacts
-        form_data = await request.form()
-        contact_count = 0
-        
-        # Count how many contacts were submitted
-        for key in form_data.keys():
-            if key.startswith('contact_name_'):
-                contact_count = max(contact_count, int(key.split('_')[-1]) + 1)
-        
-        # Add emergency contacts
-        contacts_added = 0
-        for i in range(contact_count):
-            contact_name = form_data.get(f'contact_name_{i}')
-            contact_email = form_data.get(f'contact_email_{i}')
-            contact_relationship = form_data.get(f'contact_relationship_{i}', 'Other')
-            
-            if contact_name and contact_email:
-                contact_data = {
-                    "name": contact_name,
-                    "email": contact_email,
-                    "relationship": contact_relationship
-                }
-                
-                contact_id = await EmergencyContactModel.add_contact(user_id, contact_data)
-                if contact_id:
-                    contacts_added += 1
-        
-        print(f"✅ User registered successfully: {email} with {contacts_added} emergency contacts")
+        logger.info("✅ User registered successfully: %s with %s emergency contacts", email, contacts_added)
         
         # Redirect to success page or dashboard
         return RedirectResponse(url='/registration-success', status_code=303)
         
+    except HTTPException:
+        # Validation 400s raised above must reach the client as-is rather
+        # than being rewrapped into a 500 by the catch-all below
+        raise
     except Exception as e:
-        print(f"❌ Registration error: {e}")
+        logger.error("❌ Registration error: %s", e)
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
 
 @app.get('/registration-success', response_class=HTMLResponse)
-async def registration_success(request: Request):
+def registration_success(request: Request):
     """Show registration success page"""
     return templates.TemplateResponse("registration_success.html", {
         "request": request,
@@ -341,15 +919,39 @@ async def registration_success(request: Request):
     })
 
 @app.get('/vitals', response_class=HTMLResponse)
-async def vitals(request: Request, view: str = Query('weekly')):
+async def vitals(request: Request, background_tasks: BackgroundTasks, view: str = Query('weekly')):
     """Endpoint focused on vital signs including heart rate, sleep, and calories"""
+    # One sweep over the session up front; the builder and cache key both
+    # work from this dict instead of re-probing the session
+    user = _session_user(request)
+    cache_key = (user['email'], 'vitals', view)
+    if user['credentials'] is None:
+        context = await _build_vitals_context(request, user, background_tasks, view)
+        return stream_template("vitals.html", context)
+
+    cached_context = _chart_cache_get(cache_key)
+    if cached_context is not None:
+        return stream_template("vitals.html", {"request": request, **cached_context})
+
+    # Per-key lock so concurrent misses for the same view do one upstream
+    # fetch; everyone after the first finds the entry it cached
+    async with _chart_lock(cache_key):
+        cached_context = _chart_cache_get(cache_key)
+        if cached_context is not None:
+            return stream_template("vitals.html", {"request": request, **cached_context})
+        context = await _build_vitals_context(request, user, background_tasks, view)
+        _chart_cache_put(cache_key, view, context)
+    return stream_template("vitals.html", context)
+
+async def _build_vitals_context(request: Request, user: dict, background_tasks: BackgroundTasks, view: str) -> dict:
+    """Fetch and post-process the /vitals series into a template context"""
     heart_rate_data = []
     sleep_data = []
     calories_data = []
-    
-    if 'google_credentials' in request.session:
-        credentials = Credentials(**request.session['google_credentials'])
-        service = build('fitness', 'v1', credentials=credentials)
+
+    if user['credentials'] is not None:
+        credentials = get_credentials(user['credentials'])
+        service = get_fitness_service(credentials)
         try:
             now = datetime.utcnow()
 
@@ -360,134 +962,132 @@ async def vitals(request: Request, view: str = Query('weekly')):
             else:  # yearly
                 start_time = now - timedelta(days=365)
 
-            # Fetch heart rate data
-            try:
-                heart_rate_dataset = service.users().dataset().aggregate(
-                    userId="me",
-                    body={
-                        "aggregateBy": [{"dataTypeName": "com.google.heart_rate.bpm"}],
-                        "bucketByTime": {"durationMillis": 86400000},  # Daily buckets
-                        "startTimeMillis": int(start_time.timestamp() * 1000),
-                        "endTimeMillis": int(now.timestamp() * 1000),
-                    }
-                ).execute()
-                heart_rate_data = heart_rate_dataset.get('bucket', [])
-            except Exception as e:
-                print(f"Error fetching heart rate data: {e}")
-
-            # Fetch sleep data
-            try:
-                sleep_dataset = service.users().dataset().aggregate(
-                    userId="me",
-                    body={
-                        "aggregateBy": [{"dataTypeName": "com.google.sleep.segment"}],
-                        "bucketByTime": {"durationMillis": 86400000},  # Daily buckets
-                        "startTimeMillis": int(start_time.timestamp() * 1000),
-                        "endTimeMillis": int(now.timestamp() * 1000),
-                    }
-                ).execute()
-                sleep_data = sleep_dataset.get('bucket', [])
-            except Exception as e:
-                print(f"Error fetching sleep data: {e}")
+            # Fetch heart rate, sleep and calories in one fused aggregate
+            # call - one round trip and one JSON parse for all three metrics
+            start_ms = _utc_ms(start_time)
+            end_ms = _utc_ms(now)
+            buckets_by_type = await fetch_aggregates_fused(service, [
+                "com.google.heart_rate.bpm",
+                "com.google.sleep.segment",
+                "com.google.calories.expended",
+            ], start_ms, end_ms, token=credentials.token)
+            heart_rate_data = buckets_by_type["com.google.heart_rate.bpm"]
+            sleep_data = buckets_by_type["com.google.sleep.segment"]
+            calories_data = buckets_by_type["com.google.calories.expended"]
 
-            # Fetch calories data
-            try:
-                calories_dataset = service.users().dataset().aggregate(
-                    userId="me",
-                    body={
-                        "aggregateBy": [{"dataTypeName": "com.google.calories.expended"}],
-                        "bucketByTime": {"durationMillis": 86400000},  # Daily buckets
-                        "startTimeMillis": int(start_time.timestamp() * 1000),
-                        "endTimeMillis": int(now.timestamp() * 1000),
-                    }
-                ).execute()
-                calories_data = calories_dataset.get('bucket', [])
-            except Exception as e:
-                print(f"Error fetching calories data: {e}")
-            
         except Exception as e:
-            print(f"Error fetching Google Fit data: {e}")
+            logger.error("Error fetching Google Fit data: %s", e)
 
-    # Process heart rate data
-    hr_labels = []
-    hr_values = []
-    for bucket in heart_rate_data:
-        for dataset in bucket.get('dataset', []):
-            for point in dataset.get('point', []):
-                for value in point.get('value', []):
-                    if 'fpVal' in value:
-                        date = datetime.fromtimestamp(int(bucket['startTimeMillis']) / 1000).strftime('%Y-%m-%d')
-                        hr_labels.append(date)
-                        hr_values.append(round(value['fpVal'], 1))
+    # Convert every bucket's date label in one vectorized pass up front
+    _prime_bucket_dates(heart_rate_data)
+    _prime_bucket_dates(sleep_data)
+    _prime_bucket_dates(calories_data)
 
-    # Process sleep data
+    # Process heart rate data
+    hr_pairs = list(_extract_series(heart_rate_data, 'fpVal'))
+    hr_labels, hr_raw = map(list, zip(*hr_pairs)) if hr_pairs else ([], [])
+    hr_arr = np.round(np.asarray(hr_raw, dtype=np.float64), 1)
+    hr_values = hr_arr.tolist()  # materialized once for the template
+
+    # Process sleep data - collect the raw nanosecond stamps, then compute
+    # every segment duration in one int64 vector op instead of per-point
+    # Python arithmetic
     sleep_labels = []
     sleep_values = []
+    sleep_start_ns = []
+    sleep_end_ns = []
     for bucket in sleep_data:
-        for dataset in bucket.get('dataset', []):
-            for point in dataset.get('point', []):
+        date = _bucket_date(bucket['startTimeMillis'])
+        for dataset in bucket.get('dataset', ()):
+            for point in dataset.get('point', ()):
                 if point.get('value'):
-                    date = datetime.fromtimestamp(int(bucket['startTimeMillis']) / 1000).strftime('%Y-%m-%d')
-                    # Sleep duration in minutes
-                    duration_ms = int(point['endTimeNanos']) - int(point['startTimeNanos'])
-                    duration_hours = duration_ms / (1000000000 * 3600)  # Convert to hours
                     sleep_labels.append(date)
-                    sleep_values.append(round(duration_hours, 1))
+                    sleep_start_ns.append(point['startTimeNanos'])
+                    sleep_end_ns.append(point['endTimeNanos'])
+    if sleep_start_ns:
+        durations_ns = np.array(sleep_end_ns, dtype=np.int64) - np.array(sleep_start_ns, dtype=np.int64)
+        sleep_values = np.round(durations_ns / 3.6e12, 1).tolist()  # ns -> hours
 
     # Process calories data
-    cal_labels = []
-    cal_values = []
-    for bucket in calories_data:
-        for dataset in bucket.get('dataset', []):
-            for point in dataset.get('point', []):
-                for value in point.get('value', []):
-                    if 'fpVal' in value:
-                        date = datetime.fromtimestamp(int(bucket['startTimeMillis']) / 1000).strftime('%Y-%m-%d')
-                        cal_labels.append(date)
-                        cal_values.append(round(value['fpVal'], 0))
+    cal_pairs = list(_extract_series(calories_data, 'fpVal'))
+    cal_labels, cal_values = map(list, zip(*cal_pairs)) if cal_pairs else ([], [])
+    cal_values = [round(v, 0) for v in cal_values]
 
     # Check for vital spikes and send alerts if necessary
     if hr_values:
-        user_name = request.session.get('user_name', 'GoatFit User')
-        spike_info = check_vital_spikes(hr_values, user_name)
-        
+        user_name = user['name']
+        spike_info = check_vital_spikes(hr_arr, user_name)
+
         if spike_info['alert_needed']:
-            print(f"🚨 Vital spike detected for {user_name}!")
-            send_emergency_alerts(request, spike_info, user_name)
-    
-    # Register user for 24/7 automatic monitoring
-    if 'google_credentials' in request.session:
-        user_email = request.session.get('user_email', 'unknown@user.com')
-        emergency_contacts = request.session.get('emergency_contacts', [])
-        
-        if emergency_contacts:  # Only register if they have emergency contacts
-            monitored_users[user_email] = {
-                'credentials': credentials,
-                'emergency_contacts': emergency_contacts,
-                'user_name': user_name,
-                'last_check': datetime.now()
-            }
-            print(f"✅ {user_name} registered for 24/7 automatic health monitoring")
+            logger.info("🚨 Vital spike detected for %s!", user_name)
+            # Dispatch the SMTP fan-out after the response is sent so the
+            # dashboard doesn't wait on email delivery
+            background_tasks.add_task(
+                send_emergency_alerts_to_contacts,
+                user['contacts'],
+                spike_info, user_name)
+
+    # Register user for 24/7 automatic monitoring - persisted on the user
+    # document so registration survives restarts and multi-worker deploys
+    if user['credentials'] is not None:
+        emergency_contacts = user['contacts']
+        user_id = user['user_id']
+
+        if emergency_contacts and user_id:  # Only register if they have emergency contacts
+            user_name = user['name']
+            await UserModel.update_user(user_id, {
+                'monitoring_enabled': True,
+                'google_credentials': user['credentials']
+            })
+            logger.info("✅ %s registered for 24/7 automatic health monitoring", user_name)
 
-    return templates.TemplateResponse("vitals.html", {
+    # Serialize each array once with orjson and hand the template a ready
+    # JSON string - the `| safe` interpolation then just copies bytes
+    # instead of repr-ing a Python list per render
+    context = {
         "request": request,
-        "hr_labels": hr_labels,
-        "hr_values": hr_values,
-        "sleep_labels": sleep_labels,
-        "sleep_values": sleep_values,
-        "cal_labels": cal_labels,
-        "cal_values": cal_values,
+        "hr_labels": orjson.dumps(hr_labels).decode(),
+        "hr_values": orjson.dumps(hr_values).decode(),
+        "sleep_labels": orjson.dumps(sleep_labels).decode(),
+        "sleep_values": orjson.dumps(sleep_values).decode(),
+        "cal_labels": orjson.dumps(cal_labels).decode(),
+        "cal_values": orjson.dumps(cal_values).decode(),
         "view": view
-    })
+    }
+    return context
 
 @app.get('/fit', response_class=HTMLResponse)
 async def fit(request: Request, view: str = Query('weekly')):
+    # One sweep over the session up front; the builder and cache key both
+    # work from this dict instead of re-probing the session
+    user = _session_user(request)
+    cache_key = (user['email'], 'fit', view)
+    if user['credentials'] is None:
+        context = await _build_fit_context(request, user, view)
+        return stream_template("fit.html", context)
+
+    cached_context = _chart_cache_get(cache_key)
+    if cached_context is not None:
+        return stream_template("fit.html", {"request": request, **cached_context})
+
+    # Per-key lock so concurrent misses for the same view do one upstream
+    # fetch; everyone after the first finds the entry it cached
+    async with _chart_lock(cache_key):
+        cached_context = _chart_cache_get(cache_key)
+        if cached_context is not None:
+            return stream_template("fit.html", {"request": request, **cached_context})
+        context = await _build_fit_context(request, user, view)
+        _chart_cache_put(cache_key, view, context)
+    return stream_template("fit.html", context)
+
+async def _build_fit_context(request: Request, user: dict, view: str) -> dict:
+    """Fetch and post-process the /fit series into a template context"""
     google_fit_data = []
     heart_rate_data = []
-    
-    if 'google_credentials' in request.session:
-        credentials = Credentials(**request.session['google_credentials'])
-        service = build('fitness', 'v1', credentials=credentials)
+
+    if user['credentials'] is not None:
+        credentials = get_credentials(user['credentials'])
+        service = get_fitness_service(credentials)
         try:
             now = datetime.utcnow()
 
@@ -498,71 +1098,55 @@ async def fit(request: Request, view: str = Query('weekly')):
             else:  # yearly
                 start_time = now - timedelta(days=365)
 
-            # Fetch steps data
-            steps_dataset = service.users().dataset().aggregate(
-                userId="me",
-                body={
-                    "aggregateBy": [{"dataTypeName": "com.google.step_count.delta"}],
-                    "bucketByTime": {"durationMillis": 86400000},  # Daily buckets
-                    "startTimeMillis": int(start_time.timestamp() * 1000),
-                    "endTimeMillis": int(now.timestamp() * 1000),
-                }
-            ).execute()
-            
-            google_fit_data = steps_dataset.get('bucket', [])
+            # Fetch steps and heart rate concurrently (same fused-aggregate
+            # path as /vitals) instead of two sequential blocking calls
+            start_ms = _utc_ms(start_time)
+            end_ms = _utc_ms(now)
+            buckets_by_type = await fetch_aggregates_fused(service, [
+                "com.google.step_count.delta",
+                "com.google.heart_rate.bpm",
+            ], start_ms, end_ms, token=credentials.token)
+            google_fit_data = buckets_by_type["com.google.step_count.delta"]
+            heart_rate_data = buckets_by_type["com.google.heart_rate.bpm"]
+
 
-            # Fetch heart rate data
-            heart_rate_dataset = service.users().dataset().aggregate(
-                userId="me",
-                body={
-                    "aggregateBy": [{"dataTypeName": "com.google.heart_rate.bpm"}],
-                    "bucketByTime": {"durationMillis": 86400000},  # Daily buckets
-                    "startTimeMillis": int(start_time.timestamp() * 1000),
-                    "endTimeMillis": int(now.timestamp() * 1000),
-                }
-            ).execute()
-            
-            heart_rate_data = heart_rate_dataset.get('bucket', [])
-            
         except Exception as e:
-            print(f"Error fetching Google Fit data: {e}")
+            logger.error("Error fetching Google Fit data: %s", e)
+
+    # Convert every bucket's date label in one vectorized pass up front
+    _prime_bucket_dates(google_fit_data)
+    _prime_bucket_dates(heart_rate_data)
 
     # Convert steps data to a format suitable for Chart.js
-    labels = []
-    step_values = []
-    for bucket in google_fit_data:
-        for dataset in bucket.get('dataset', []):
-            for point in dataset.get('point', []):
-                for value in point.get('value', []):
-                    if 'intVal' in value:
-                        date = datetime.fromtimestamp(int(bucket['startTimeMillis']) / 1000).strftime('%Y-%m-%d')
-                        labels.append(date)
-                        step_values.append(value['intVal'])
+    step_pairs = list(_extract_series(google_fit_data, 'intVal'))
+    labels, step_values = map(list, zip(*step_pairs)) if step_pairs else ([], [])
 
     # Convert heart rate data to a format suitable for Chart.js
-    hr_labels = []
-    hr_values = []
-    for bucket in heart_rate_data:
-        for dataset in bucket.get('dataset', []):
-            for point in dataset.get('point', []):
-                for value in point.get('value', []):
-                    if 'fpVal' in value:
-                        date = datetime.fromtimestamp(int(bucket['startTimeMillis']) / 1000).strftime('%Y-%m-%d')
-                        hr_labels.append(date)
-                        hr_values.append(round(value['fpVal'], 1))
-
-    return templates.TemplateResponse("fit.html", {
+    hr_pairs = list(_extract_series(heart_rate_data, 'fpVal'))
+    hr_labels, hr_raw = map(list, zip(*hr_pairs)) if hr_pairs else ([], [])
+    hr_arr = np.round(np.asarray(hr_raw, dtype=np.float64), 1)
+    hr_values = hr_arr.tolist()  # materialized once for the template
+
+    # Serialize each array once with orjson and hand the template a ready
+    # JSON string - the `| safe` interpolation then just copies bytes
+    # instead of repr-ing a Python list per render
+    context = {
         "request": request,
-        "labels": labels, 
-        "values": step_values,
-        "hr_labels": hr_labels,
-        "hr_values": hr_values,
+        "labels": orjson.dumps(labels).decode(),
+        "values": orjson.dumps(step_values).decode(),
+        "hr_labels": orjson.dumps(hr_labels).decode(),
+        "hr_values": orjson.dumps(hr_values).decode(),
         "view": view
-    })
+    }
+    return context
+
+def _contacts_by_id(contacts: list) -> dict:
+    """Index session contacts by id for constant-time lookup"""
+    return {c['id']: c for c in contacts}
 
 # Emergency Contact Management Routes
 @app.get('/emergency-contacts', response_class=HTMLResponse)
-async def emergency_contacts(request: Request):
+def emergency_contacts(request: Request):
     """Emergency contact management page"""
     return templates.TemplateResponse("emergency_contacts.html", {
         "request": request,
@@ -604,19 +1188,18 @@ async def add_emergency_contact(request: Request,
 async def remove_emergency_contact(request: Request, contact_id: int):
     """Remove an emergency contact"""
     
-    contacts = request.session.get('emergency_contacts', [])
-    contacts = [c for c in contacts if c['id'] != contact_id]
-    request.session['emergency_contacts'] = contacts
-    
+    by_id = _contacts_by_id(request.session.get('emergency_contacts', []))
+    by_id.pop(contact_id, None)
+    request.session['emergency_contacts'] = list(by_id.values())
+
     return RedirectResponse(url="/emergency-contacts", status_code=303)
 
 @app.post('/emergency-contacts/test/{contact_id}')
 async def test_emergency_contact(request: Request, contact_id: int):
     """Send a test alert to an emergency contact"""
     
-    contacts = request.session.get('emergency_contacts', [])
-    contact = next((c for c in contacts if c['id'] == contact_id), None)
-    
+    contact = _contacts_by_id(request.session.get('emergency_contacts', [])).get(contact_id)
+
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
     
@@ -624,9 +1207,9 @@ async def test_emergency_contact(request: Request, contact_id: int):
     success = alert_service.test_email_service(contact['email'])
     
     if success:
-        return JSONResponse({"success": True, "message": f"Test alert sent to {contact['name']}"})
+        return ORJSONResponse({"success": True, "message": f"Test alert sent to {contact['name']}"})
     else:
-        return JSONResponse({"success": False, "message": "Failed to send test alert"})
+        return ORJSONResponse({"success": False, "message": "Failed to send test alert"})
 
 # Vital Spike Detection and Alert System
 def check_vital_spikes(hr_values: list, user_name: str = "User"):
@@ -634,97 +1217,136 @@ def check_vital_spikes(hr_values: list, user_name: str = "User"):
     Check for dangerous vital spikes and send alerts
     
     Args:
-        hr_values: List of heart rate values
+        hr_values: Heart rate values (list or ndarray)
         user_name: Name of the user
     """
-    
-    if not hr_values:
-        return {"alert_needed": False, "heart_rate": 0, "threshold": 0, "severity": "NORMAL"}
-    
+
+    # Tiny inputs (the quick-test and simulation endpoints pass a single
+    # reading) skip ndarray construction entirely - the builtin max/min/sum
+    # C loops beat numpy below a handful of values
+    if isinstance(hr_values, (list, tuple)) and len(hr_values) <= 8:
+        if not hr_values:
+            return {"alert_needed": False, "heart_rate": 0, "threshold": 0, "severity": "NORMAL",
+                    "max_hr": 0, "min_hr": 0, "avg_hr": 0}
+        latest_hr = float(hr_values[-1])
+        nonzero = [float(v) for v in hr_values if v > 0]
+        if nonzero:
+            max_hr = max(nonzero)
+            min_hr = min(nonzero)
+            avg_hr = round(sum(nonzero) / len(nonzero), 1)
+        else:
+            max_hr = min_hr = avg_hr = 0.0
+    else:
+        hr_arr = np.asarray(hr_values, dtype=np.float64)
+        if hr_arr.size == 0:
+            return {"alert_needed": False, "heart_rate": 0, "threshold": 0, "severity": "NORMAL",
+                    "max_hr": 0, "min_hr": 0, "avg_hr": 0}
+        latest_hr = float(hr_arr[-1])
+
+        # Window statistics over the whole series in one C-level pass each -
+        # zero readings are dropped so device gaps don't drag the min/mean down
+        nz = hr_arr[hr_arr > 0]
+        if nz.size:
+            max_hr = float(nz.max())
+            min_hr = float(nz.min())
+            avg_hr = float(round(nz.mean(), 1))
+        else:
+            max_hr = min_hr = avg_hr = 0.0
+
     # Heart rate thresholds - TESTING MODE (All set to 60 for easy testing)
     HIGH_HR_WARNING = 100   # BPM - Test threshold
-    HIGH_HR_CRITICAL = 120  # BPM - Test threshold  
+    HIGH_HR_CRITICAL = 120  # BPM - Test threshold
     LOW_HR_WARNING = 60    # BPM - Test threshold
     LOW_HR_CRITICAL = 50   # BPM - Test threshold
-    
-    print(f"🔍 Debug (vitals): HR values: {hr_values}")
-    print(f"🔍 Debug (vitals): Latest HR: {hr_values[-1] if hr_values else 0} BPM")
-    print(f"🔍 Debug (vitals): Thresholds - HIGH_WARNING: {HIGH_HR_WARNING}, HIGH_CRITICAL: {HIGH_HR_CRITICAL}")
-    
-    latest_hr = hr_values[-1] if hr_values else 0
-    
+
+    logger.debug("(vitals) HR values: %s", hr_values)
+    logger.debug("(vitals) Latest HR: %s BPM", latest_hr)
+    logger.debug("(vitals) Thresholds - HIGH_WARNING: %s, HIGH_CRITICAL: %s", HIGH_HR_WARNING, HIGH_HR_CRITICAL)
+
     # Check for dangerous heart rate
     alert_needed = False
     threshold = 0
-    
+
     if latest_hr >= HIGH_HR_CRITICAL:
         alert_needed = True
         threshold = HIGH_HR_CRITICAL
-        print(f"🚨 CRITICAL: Heart rate {latest_hr} exceeds critical threshold!")
+        logger.info("🚨 CRITICAL: Heart rate %s exceeds critical threshold!", latest_hr)
     elif latest_hr >= HIGH_HR_WARNING:
         alert_needed = True
         threshold = HIGH_HR_WARNING
-        print(f"⚠️ WARNING: Heart rate {latest_hr} exceeds warning threshold!")
+        logger.warning("⚠️ WARNING: Heart rate %s exceeds warning threshold!", latest_hr)
     elif latest_hr <= LOW_HR_CRITICAL and latest_hr > 0:
         alert_needed = True
         threshold = LOW_HR_CRITICAL
-        print(f"🚨 CRITICAL: Heart rate {latest_hr} below critical threshold!")
+        logger.info("🚨 CRITICAL: Heart rate %s below critical threshold!", latest_hr)
     elif latest_hr <= LOW_HR_WARNING and latest_hr > 0:
         alert_needed = True
         threshold = LOW_HR_WARNING
-        print(f"⚠️ WARNING: Heart rate {latest_hr} below warning threshold!")
-    
+        logger.warning("⚠️ WARNING: Heart rate %s below warning threshold!", latest_hr)
+
     return {
         "alert_needed": alert_needed,
         "heart_rate": latest_hr,
         "threshold": threshold,
-        "severity": "CRITICAL" if latest_hr >= HIGH_HR_CRITICAL or latest_hr <= LOW_HR_CRITICAL else "WARNING"
+        "severity": "CRITICAL" if latest_hr >= HIGH_HR_CRITICAL or latest_hr <= LOW_HR_CRITICAL else "WARNING",
+        "max_hr": max_hr,
+        "min_hr": min_hr,
+        "avg_hr": avg_hr
     }
 
 def send_emergency_alerts(request: Request, spike_info: dict, user_name: str = "User"):
-    """Send alerts to all emergency contacts"""
-    
+    """Send alerts to all emergency contacts from the session"""
+    send_emergency_alerts_to_contacts(
+        request.session.get('emergency_contacts', []), spike_info, user_name
+    )
+
+def send_emergency_alerts_to_contacts(contacts: list, spike_info: dict, user_name: str = "User"):
+    """Send alerts to the given emergency contacts.
+
+    Takes plain data instead of the Request so it can run as a background
+    task after the response has been sent.
+    """
+
     if not spike_info.get("alert_needed"):
         return
-    
-    contacts = request.session.get('emergency_contacts', [])
-    
+
     if not contacts:
-        print("⚠️ No emergency contacts configured for alerts")
+        logger.warning("⚠️ No emergency contacts configured for alerts")
         return
     
+    enabled_contacts = [c for c in contacts if c.get('notifications_enabled', True)]
+
+    # One SMTP session for the whole contact list instead of reconnecting per email
+    results = alert_service.send_emergency_alert_batch(
+        emergency_contact_emails=[c['email'] for c in enabled_contacts],
+        user_name=user_name,
+        vital_type="Heart Rate",
+        vital_value=spike_info['heart_rate'],
+        threshold=spike_info['threshold']
+    )
+
     alert_count = 0
-    for contact in contacts:
-        if contact.get('notifications_enabled', True):
-            try:
-                success = send_heart_rate_alert(
-                    emergency_email=contact['email'],
-                    user_name=user_name,
-                    heart_rate=spike_info['heart_rate'],
-                    threshold=spike_info['threshold']
-                )
-                
-                if success:
-                    alert_count += 1
-                    print(f"✅ Alert sent to {contact['name']} ({contact['email']})")
-                else:
-                    print(f"❌ Failed to send alert to {contact['name']} ({contact['email']})")
-                    
-            except Exception as e:
-                print(f"❌ Error sending alert to {contact['name']}: {e}")
+    for contact in enabled_contacts:
+        # Bind the fields once per contact instead of re-doing dict lookups below
+        contact_name = contact['name']
+        contact_email = contact['email']
+        if results.get(contact_email):
+            alert_count += 1
+            logger.info("✅ Alert sent to %s (%s)", contact_name, contact_email)
+        else:
+            logger.error("❌ Failed to send alert to %s (%s)", contact_name, contact_email)
     
-    print(f"📧 Emergency alerts sent to {alert_count}/{len(contacts)} contacts")
+    logger.info("📧 Emergency alerts sent to %s/%s contacts", alert_count, len(contacts))
 
 @app.get('/test-auth')
 async def test_auth(request: Request):
     """Test Google Fit authentication and basic data access"""
     
     if 'google_credentials' not in request.session:
-        return JSONResponse({"error": "Not authenticated with Google Fit", "auth_url": "/authorize/google"})
+        return ORJSONResponse({"error": "Not authenticated with Google Fit", "auth_url": "/authorize/google"})
     
     try:
-        credentials = Credentials(**request.session['google_credentials'])
-        service = build('fitness', 'v1', credentials=credentials)
+        credentials, service = get_fit_service(request)
         
         # Test basic access
         profile = service.users().profile().get(userId="me").execute()
@@ -743,7 +1365,7 @@ async def test_auth(request: Request):
                     "device": ds.get('device', {}).get('model', 'Unknown')
                 })
         
-        return JSONResponse({
+        return ORJSONResponse({
             "authenticated": True,
             "user_profile": profile,
             "total_data_sources": len(data_sources.get('dataSource', [])),
@@ -752,7 +1374,7 @@ async def test_auth(request: Request):
         })
         
     except Exception as e:
-        return JSONResponse({
+        return ORJSONResponse({
             "authenticated": False,
             "error": str(e),
             "suggestion": "Try re-authenticating at /authorize/google"
@@ -763,7 +1385,7 @@ async def test_latest_monitoring(request: Request):
     """Test the latest monitoring system with current user"""
     
     if 'google_credentials' not in request.session:
-        return JSONResponse({"error": "Not authenticated with Google Fit"})
+        return ORJSONResponse({"error": "Not authenticated with Google Fit"})
     
     try:
         # Get user from database
@@ -771,31 +1393,33 @@ async def test_latest_monitoring(request: Request):
         user = await UserModel.get_user_by_email(user_email)
         
         if not user:
-            return JSONResponse({"error": "User not found in database"})
+            return ORJSONResponse({"error": "User not found in database"})
         
         # Get emergency contacts
         emergency_contacts = await EmergencyContactModel.get_user_contacts(user['_id'])
         
         if not emergency_contacts:
-            return JSONResponse({"error": "No emergency contacts found"})
+            return ORJSONResponse({"error": "No emergency contacts found"})
         
         # Test the monitoring function
-        credentials = Credentials(**request.session['google_credentials'])
-        
-        # Capture the monitoring results
-        import io
-        import sys
-        from contextlib import redirect_stdout
+        credentials = get_credentials(request.session['google_credentials'])
         
+        # Capture the monitoring results. The monitor logs through the
+        # queued "goatfit" logger rather than printing, so hang a temporary
+        # handler off it for the duration of the check.
         output_buffer = io.StringIO()
-        
+        capture_handler = logging.StreamHandler(output_buffer)
+
         try:
-            with redirect_stdout(output_buffer):
+            logger.addHandler(capture_handler)
+            try:
                 await check_user_health_automatically_db(user, credentials, emergency_contacts)
-            
+            finally:
+                logger.removeHandler(capture_handler)
+
             monitoring_output = output_buffer.getvalue()
             
-            return JSONResponse({
+            return ORJSONResponse({
                 "success": True,
                 "user_email": user_email,
                 "emergency_contacts": len(emergency_contacts),
@@ -804,25 +1428,24 @@ async def test_latest_monitoring(request: Request):
             })
             
         except Exception as e:
-            return JSONResponse({
+            return ORJSONResponse({
                 "success": False,
                 "error": str(e),
                 "monitoring_output": output_buffer.getvalue()
             })
             
     except Exception as e:
-        return JSONResponse({"error": str(e)})
+        return ORJSONResponse({"error": str(e)})
 
 @app.get('/force-latest-sync')
 async def force_latest_sync(request: Request):
     """Try different methods to get the absolute latest heart rate data"""
     
     if 'google_credentials' not in request.session:
-        return JSONResponse({"error": "Not authenticated with Google Fit"})
+        return ORJSONResponse({"error": "Not authenticated with Google Fit"})
     
     try:
-        credentials = Credentials(**request.session['google_credentials'])
-        service = build('fitness', 'v1', credentials=credentials)
+        credentials, service = get_fit_service(request)
         
         # Use current local time instead of UTC to account for timezone
         now_local = datetime.now()
@@ -837,10 +1460,9 @@ async def force_latest_sync(request: Request):
         }
         
         # Method 1: Use very recent time window (last 2 hours)
-        start_recent = now_utc - timedelta(hours=2)
-        
-        try:
-            recent_aggregate = service.users().dataset().aggregate(
+        async def _recent_aggregate():
+            start_recent = now_utc - timedelta(hours=2)
+            recent_aggregate = await execute_api_request(service.users().dataset().aggregate(
                 userId="me",
                 body={
                     "aggregateBy": [{"dataTypeName": "com.google.heart_rate.bpm"}],
@@ -848,83 +1470,67 @@ async def force_latest_sync(request: Request):
                     "startTimeMillis": int(start_recent.timestamp() * 1000),
                     "endTimeMillis": int(now_utc.timestamp() * 1000),
                 }
-            ).execute()
-            
-            recent_points = []
-            for bucket in recent_aggregate.get('bucket', []):
-                bucket_time = datetime.fromtimestamp(int(bucket['startTimeMillis']) / 1000)
-                for dataset in bucket.get('dataset', []):
-                    for point in dataset.get('point', []):
-                        for value in point.get('value', []):
-                            if 'fpVal' in value:
-                                recent_points.append({
-                                    "time": bucket_time.isoformat(),
-                                    "heart_rate": round(value['fpVal'], 1),
-                                    "method": "recent_aggregate"
-                                })
-            
-            results["methods"]["recent_aggregate"] = {
-                "points_found": len(recent_points),
-                "data": recent_points
+            ))
+
+            times, values = _extract_hr_points(recent_aggregate.get('bucket', ()))
+
+            return {
+                "points_found": len(values),
+                "data": [
+                    {"time": t, "heart_rate": v, "method": "recent_aggregate"}
+                    for t, v in zip(times, values)
+                ]
             }
-            
-        except Exception as e:
-            results["methods"]["recent_aggregate"] = {"error": str(e)}
-        
+
         # Method 2: Query NoiseColorFit raw data directly for today
-        try:
+        async def _noisefit_raw_today():
             # Start from beginning of today
-            today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            
+            today_start = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
+
             # Convert to UTC for API
             today_start_utc = today_start.utctimetuple()
             today_start_utc = datetime(*today_start_utc[:6])
-            
+
             dataset_id = f"{int(today_start_utc.timestamp() * 1000000000)}-{int(now_utc.timestamp() * 1000000000)}"
-            
+
             # Query the NoiseColorFit raw data source
-            noisefit_data = service.users().dataSources().datasets().get(
-                userId="me",
-                dataSourceId="raw:com.google.heart_rate.bpm:com.noisefit:noise_activity - Heart data",
-                datasetId=dataset_id
-            ).execute()
-            
-            noisefit_points = []
-            for point in noisefit_data.get('point', []):
-                point_time = datetime.fromtimestamp(int(point.get('startTimeNanos', 0)) / 1000000000)
-                for value in point.get('value', []):
-                    if 'fpVal' in value:
-                        noisefit_points.append({
-                            "time": point_time.isoformat(),
-                            "heart_rate": round(value['fpVal'], 1),
-                            "method": "noisefit_raw_today"
-                        })
-            
-            # Sort by time (most recent first)
-            noisefit_points.sort(key=lambda x: x["time"], reverse=True)
-            
-            results["methods"]["noisefit_raw_today"] = {
+            noisefit_data = await fetch_dataset(
+                service, credentials,
+                "raw:com.google.heart_rate.bpm:com.noisefit:noise_activity - Heart data",
+                dataset_id
+            )
+
+            # Decode to (nanos, bpm) tuples first and sort on the integer
+            # timestamp; only the 10 readings actually returned pay for
+            # datetime conversion and dict construction
+            pts = [(int(point.get('startTimeNanos', 0)), value['fpVal'])
+                   for point in noisefit_data.get('point', ())
+                   for value in point.get('value', ())
+                   if 'fpVal' in value]
+            pts.sort(key=lambda t: t[0], reverse=True)
+
+            noisefit_points = [{
+                "time": datetime.fromtimestamp(ns / 1000000000).isoformat(),
+                "heart_rate": round(bpm, 1),
+                "method": "noisefit_raw_today"
+            } for ns, bpm in pts[:10]]
+
+            return {
                 "query_start": today_start_utc.isoformat(),
-                "points_found": len(noisefit_points),
-                "data": noisefit_points[:10]  # Show last 10 readings
+                "points_found": len(pts),
+                "data": noisefit_points  # Show last 10 readings
             }
-            
-        except Exception as e:
-            results["methods"]["noisefit_raw_today"] = {"error": str(e)}
-        
+
         # Method 3: Use local timezone for queries
-        try:
-            # Query using local timezone
-            import pytz
-            local_tz = pytz.timezone('Asia/Kolkata')  # Adjust to your timezone
-            now_local_tz = datetime.now(local_tz)
+        async def _local_timezone():
+            now_local_tz = datetime.now(LOCAL_TZ)
             start_local = now_local_tz - timedelta(hours=6)
-            
+
             # Convert to UTC for API
-            start_utc_from_local = start_local.astimezone(pytz.UTC).replace(tzinfo=None)
-            end_utc_from_local = now_local_tz.astimezone(pytz.UTC).replace(tzinfo=None)
-            
-            local_aggregate = service.users().dataset().aggregate(
+            start_utc_from_local = start_local.astimezone(UTC_TZ).replace(tzinfo=None)
+            end_utc_from_local = now_local_tz.astimezone(UTC_TZ).replace(tzinfo=None)
+
+            local_aggregate = await execute_api_request(service.users().dataset().aggregate(
                 userId="me",
                 body={
                     "aggregateBy": [{"dataTypeName": "com.google.heart_rate.bpm"}],
@@ -932,282 +1538,384 @@ async def force_latest_sync(request: Request):
                     "startTimeMillis": int(start_utc_from_local.timestamp() * 1000),
                     "endTimeMillis": int(end_utc_from_local.timestamp() * 1000),
                 }
-            ).execute()
-            
-            local_points = []
-            for bucket in local_aggregate.get('bucket', []):
-                bucket_time = datetime.fromtimestamp(int(bucket['startTimeMillis']) / 1000)
-                for dataset in bucket.get('dataset', []):
-                    for point in dataset.get('point', []):
-                        for value in point.get('value', []):
-                            if 'fpVal' in value:
-                                local_points.append({
-                                    "time": bucket_time.isoformat(),
-                                    "heart_rate": round(value['fpVal'], 1),
-                                    "method": "local_timezone"
-                                })
-            
-            results["methods"]["local_timezone"] = {
+            ))
+
+            times, values = _extract_hr_points(local_aggregate.get('bucket', ()))
+
+            return {
                 "local_start": start_local.isoformat(),
-                "points_found": len(local_points),
-                "data": local_points
+                "points_found": len(values),
+                "data": [
+                    {"time": t, "heart_rate": v, "method": "local_timezone"}
+                    for t, v in zip(times, values)
+                ]
             }
-            
-        except Exception as e:
-            results["methods"]["local_timezone"] = {"error": str(e)}
-        
-        return JSONResponse(results)
+
+        # The three methods are independent queries - run them concurrently
+        # so the endpoint takes as long as the slowest, not the sum
+        method_names = ("recent_aggregate", "noisefit_raw_today", "local_timezone")
+        method_results = await asyncio.gather(
+            _recent_aggregate(), _noisefit_raw_today(), _local_timezone(),
+            return_exceptions=True
+        )
+        for name, result in zip(method_names, method_results):
+            if isinstance(result, Exception):
+                result = {"error": str(result)}
+            results["methods"][name] = result
+
+        return ORJSONResponse(results)
         
     except Exception as e:
-        return JSONResponse({"error": str(e)})
+        return ORJSONResponse({"error": str(e)})
 
 @app.get('/debug-latest-data')
-async def debug_latest_data(request: Request):
+async def debug_latest_data(request: Request, verbose: int = Query(0)):
     """Debug endpoint to check the very latest heart rate data with detailed timestamps"""
     
     if 'google_credentials' not in request.session:
-        return JSONResponse({"error": "Not authenticated with Google Fit"})
+        return ORJSONResponse({"error": "Not authenticated with Google Fit"})
     
     try:
-        credentials = Credentials(**request.session['google_credentials'])
-        service = build('fitness', 'v1', credentials=credentials)
-        now = datetime.utcnow()
-        
-        # Check current time and timezone
-        local_now = datetime.now()
-        
-        debug_info = {
-            "current_utc": now.isoformat(),
-            "current_local": local_now.isoformat(),
-            "query_results": {}
-        }
-        
-        # Try multiple recent time windows
-        time_windows = [
-            ("last 1 hour", timedelta(hours=1)),
-            ("last 6 hours", timedelta(hours=6)),
-            ("last 24 hours", timedelta(hours=24)),
-            ("last 3 days", timedelta(days=3))
-        ]
-        
-        for window_name, time_delta in time_windows:
-            start_time = now - time_delta
-            
-            debug_info["query_results"][window_name] = {
-                "start_time": start_time.isoformat(),
-                "end_time": now.isoformat(),
-                "data_sources": {}
-            }
-            
-            try:
-                # Get all data sources first
-                data_sources = service.users().dataSources().list(userId="me").execute()
-                
-                # Find heart rate sources
-                hr_sources = []
-                for ds in data_sources.get('dataSource', []):
-                    data_type = ds.get('dataType', {}).get('name', '')
-                    if 'heart_rate' in data_type.lower():
-                        hr_sources.append(ds)
-                
-                # Query each heart rate source
-                for ds in hr_sources:
-                    source_name = ds.get('dataStreamName', 'Unknown')
-                    dataset_id = f"{int(start_time.timestamp() * 1000000000)}-{int(now.timestamp() * 1000000000)}"
-                    
-                    try:
-                        data_response = service.users().dataSources().datasets().get(
-                            userId="me",
-                            dataSourceId=ds['dataStreamId'],
-                            datasetId=dataset_id
-                        ).execute()
-                        
-                        points = data_response.get('point', [])
-                        
-                        debug_info["query_results"][window_name]["data_sources"][source_name] = {
-                            "total_points": len(points),
-                            "source_id": ds['dataStreamId'],
-                            "application": ds.get('application', {}).get('packageName', 'Unknown'),
-                            "latest_points": []
-                        }
-                        
-                        # Get the 5 most recent points
-                        if points:
-                            # Sort by time (most recent first)
-                            points.sort(key=lambda p: int(p.get('startTimeNanos', 0)), reverse=True)
-                            
-                            for point in points[:5]:  # Top 5 most recent
-                                point_time_ns = int(point.get('startTimeNanos', 0))
-                                point_time = datetime.fromtimestamp(point_time_ns / 1000000000)
-                                
-                                for value in point.get('value', []):
-                                    if 'fpVal' in value or 'intVal' in value:
-                                        hr_value = value.get('fpVal', value.get('intVal', 0))
-                                        
-                                        debug_info["query_results"][window_name]["data_sources"][source_name]["latest_points"].append({
-                                            "timestamp": point_time.isoformat(),
-                                            "heart_rate": hr_value,
-                                            "timestamp_ns": point_time_ns,
-                                            "raw_point": point
-                                        })
-                        
-                    except Exception as e:
-                        debug_info["query_results"][window_name]["data_sources"][source_name] = {
-                            "error": str(e)
-                        }
-                        
-            except Exception as e:
-                debug_info["query_results"][window_name]["error"] = str(e)
-        
-        return JSONResponse(debug_info)
-        
+        credentials, service = get_fit_service(request)
+    except Exception as e:
+        return ORJSONResponse({"error": str(e)})
+
+    async def _stream():
+        # The envelope goes out before the Google round trip completes, and
+        # each window is serialized and released on its own, so the whole
+        # multi-window payload never sits in memory twice
+        yield (b'{"current_utc":' + orjson.dumps(datetime.utcnow().isoformat())
+               + b',"current_local":' + orjson.dumps(datetime.now().isoformat())
+               + b',"query_results":{')
+        try:
+            query_results = await _debug_hr_windows_batched(
+                service, credentials, verbose=bool(verbose)
+            )
+        except Exception as e:
+            yield b'},"error":' + orjson.dumps(str(e)) + b'}'
+            return
+
+        first = True
+        for window_name in list(query_results):
+            fragment = orjson.dumps(query_results.pop(window_name))
+            yield ((b'' if first else b',')
+                   + orjson.dumps(window_name) + b':' + fragment)
+            first = False
+        yield b'}}'
+
+    return StreamingResponse(_stream(), media_type="application/json")
+
+# Fit dataType names are fixed, documented constants, so an exact membership
+# test beats lowercasing and substring-scanning every source name
+_HR_TYPES = frozenset({
+    "com.google.heart_rate.bpm",
+    "com.google.heart_rate.summary",
+})
+
+def _list_hr_sources(data_sources: dict) -> list:
+    """Filter a dataSources().list response down to heart rate streams"""
+    return [
+        ds for ds in data_sources.get('dataSource', [])
+        if ds.get('dataType', {}).get('name') in _HR_TYPES
+    ]
+
+# Registered data sources change when a device is paired, not per request;
+# cache the filtered heart rate source list per user for a few minutes so
+# repeated debug calls skip the listing round trip entirely
+_ds_cache = {}
+DS_CACHE_TTL = 300  # seconds
+
+async def _get_hr_sources(service, user_key: str) -> tuple:
+    """Return (total_sources, hr_sources) for a user, cached for DS_CACHE_TTL"""
+    cached = _ds_cache.get(user_key)
+    if cached and time.time() - cached[0] < DS_CACHE_TTL:
+        return cached[1], cached[2]
+
+    try:
+        data_sources = await asyncio.to_thread(_data_sources_list_rest_sync, user_key)
     except Exception as e:
-        return JSONResponse({"error": str(e)})
+        logger.warning("REST dataSources list failed, falling back to discovery client: %s", e)
+        data_sources = await execute_api_request(service.users().dataSources().list(userId="me"))
+    total_sources = len(data_sources.get('dataSource', []))
+    hr_sources = _list_hr_sources(data_sources)
+
+    _ds_cache[user_key] = (time.time(), total_sources, hr_sources)
+    if len(_ds_cache) > 256:
+        _ds_cache.clear()
+    return total_sources, hr_sources
+
+def _batch_dataset_gets(service, requests_by_id: dict) -> tuple:
+    """Execute dataset gets for {request_id: (source_id, dataset_id)} in one batch
+
+    A single BatchHttpRequest multiplexes every get over one HTTP round trip
+    instead of issuing a serial request per (window, source) pair. Returns
+    (responses, errors) keyed by request_id.
+    """
+    responses = {}
+    errors = {}
+
+    def _collect(request_id, response, exception):
+        if exception is not None:
+            errors[request_id] = exception
+        else:
+            responses[request_id] = response
+
+    batch = service.new_batch_http_request(callback=_collect)
+    for request_id, (source_id, dataset_id) in requests_by_id.items():
+        batch.add(
+            service.users().dataSources().datasets().get(
+                userId="me",
+                dataSourceId=source_id,
+                datasetId=dataset_id
+            ),
+            request_id=request_id
+        )
+    batch.execute(http=_fresh_http(service._http))
+    return responses, errors
+
+def _summarize_hr_points(ds: dict, points: list, verbose: bool = False) -> dict:
+    """Build the per-source debug summary for the 5 most recent points
+
+    The full raw point dicts dominate the response size, so they are only
+    echoed back when the caller explicitly asks with ?verbose=1.
+    """
+    source_result = {
+        "total_points": len(points),
+        "source_id": ds['dataStreamId'],
+        "application": ds.get('application', {}).get('packageName', 'Unknown'),
+        "latest_points": []
+    }
+
+    if points:
+        # Decorate each point with its integer timestamp once, then pick the
+        # 5 most recent. Big windows go through a C-level partial sort on a
+        # packed int64 array; small ones stay on the pure-Python heap.
+        if len(points) > 256:
+            keys = np.fromiter((int(p.get('startTimeNanos', 0)) for p in points),
+                               dtype=np.int64, count=len(points))
+            idx = np.argpartition(-keys, 5)[:5]
+            idx = idx[np.argsort(-keys[idx])]
+            top = [(int(keys[i]), points[i]) for i in idx]
+        else:
+            keyed = [(int(p.get('startTimeNanos', 0)), p) for p in points]
+            top = heapq.nlargest(5, keyed, key=lambda kp: kp[0])
+
+        lp_append = source_result["latest_points"].append
+        for point_time_ns, point in top:
+            # Integer divmod avoids float round-off on nanosecond stamps,
+            # and the fixed UTC tz keeps output deterministic across hosts
+            # (the window bounds in this endpoint are UTC already)
+            secs, _ = divmod(point_time_ns, 1_000_000_000)
+
+            for value in point.get('value', ()):
+                if 'fpVal' in value or 'intVal' in value:
+                    hr_value = value.get('fpVal', value.get('intVal', 0))
+
+                    entry = {
+                        "timestamp": _iso_utc(secs),
+                        "heart_rate": hr_value,
+                        "timestamp_ns": point_time_ns,
+                    }
+                    if verbose:
+                        entry["raw_point"] = point
+                    lp_append(entry)
+
+    return source_result
+
+# Window/bucket tables built once at import - the endpoints read them,
+# never mutate them, so there is no reason to rebuild per request
+_HEARTRATE_WINDOWS = (
+    ("5 minutes", timedelta(minutes=5), 60000),      # 1-minute buckets
+    ("30 minutes", timedelta(minutes=30), 300000),   # 5-minute buckets
+    ("24 hours", timedelta(hours=24), 3600000),      # 1-hour buckets
+    ("7 days", timedelta(days=7), 86400000),         # 1-day buckets
+)
+
+# Window spans as integer nanoseconds: dataset ids come out of plain int
+# subtraction off one time.time_ns() base instead of per-window timedelta
+# arithmetic and float .timestamp() conversions
+_DEBUG_WINDOWS_NS = (
+    ("last 1 hour", 3_600 * 10**9),
+    ("last 6 hours", 6 * 3_600 * 10**9),
+    ("last 24 hours", 24 * 3_600 * 10**9),
+    ("last 3 days", 3 * 86_400 * 10**9),
+)
+
+async def _debug_hr_windows_batched(service, credentials, verbose: bool = False) -> dict:
+    """Collect the latest heart rate points for every (window, source) pair
+
+    The source listing happens once for all windows, then every dataset get
+    rides a single batched request rather than one round trip per pair.
+    """
+    # Get all data sources once, not once per window
+    _, hr_sources = await _get_hr_sources(service, credentials.token)
+
+    now_ns = time.time_ns()
+    end_iso = _iso_utc(now_ns // 1_000_000_000)
+    requests_by_id = {}
+    for window_name, span_ns in _DEBUG_WINDOWS_NS:
+        start_ns = now_ns - span_ns
+        for ds in hr_sources:
+            requests_by_id[f"{window_name}|{ds['dataStreamId']}"] = (
+                ds['dataStreamId'], f"{start_ns}-{now_ns}"
+            )
+
+    responses, errors = await asyncio.to_thread(_batch_dataset_gets, service, requests_by_id)
+
+    query_results = {}
+    for window_name, span_ns in _DEBUG_WINDOWS_NS:
+        window_result = {
+            "start_time": _iso_utc((now_ns - span_ns) // 1_000_000_000),
+            "end_time": end_iso,
+            "data_sources": {}
+        }
+        query_results[window_name] = window_result
+
+        for ds in hr_sources:
+            source_name = ds.get('dataStreamName', 'Unknown')
+            request_id = f"{window_name}|{ds['dataStreamId']}"
+            if request_id in errors:
+                window_result["data_sources"][source_name] = {
+                    "error": str(errors[request_id])
+                }
+                continue
+
+            points = responses.get(request_id, {}).get('point', ())
+            window_result["data_sources"][source_name] = _summarize_hr_points(ds, points, verbose)
+
+    return query_results
 
 @app.get('/simple-hr-test')
 async def simple_hr_test(request: Request):
     """Simple heart rate test with raw data sources"""
     
     if 'google_credentials' not in request.session:
-        return JSONResponse({"error": "Not authenticated with Google Fit"})
+        return ORJSONResponse({"error": "Not authenticated with Google Fit"})
     
     try:
-        credentials = Credentials(**request.session['google_credentials'])
-        service = build('fitness', 'v1', credentials=credentials)
-        now = datetime.utcnow()
-        
-        # Try last 7 days
-        start_time = now - timedelta(days=7)
-        
-        # Get data sources
-        data_sources = service.users().dataSources().list(userId="me").execute()
-        
+        credentials, service = get_fit_service(request)
+
+        # Get data sources (served from the per-user TTL cache when fresh)
+        total_sources, hr_sources = await _get_hr_sources(service, credentials.token)
+
         results = {
-            "total_sources": len(data_sources.get('dataSource', [])),
+            "total_sources": total_sources,
             "heart_rate_sources": [],
             "heart_rate_data": []
         }
-        
-        # Find heart rate sources
-        for ds in data_sources.get('dataSource', []):
-            data_type = ds.get('dataType', {}).get('name', '')
-            if 'heart_rate' in data_type.lower():
-                source_info = {
-                    "name": ds.get('dataStreamName', 'Unknown'),
-                    "id": ds.get('dataStreamId', ''),
-                    "type": ds.get('type', ''),
-                    "data_type": data_type,
-                    "application": ds.get('application', {}).get('packageName', 'Unknown')
-                }
-                results["heart_rate_sources"].append(source_info)
-                
-                # Try to get data from this source
-                try:
-                    dataset_id = f"{int(start_time.timestamp() * 1000000000)}-{int(now.timestamp() * 1000000000)}"
-                    
-                    data_response = service.users().dataSources().datasets().get(
-                        userId="me",
-                        dataSourceId=ds['dataStreamId'],
-                        datasetId=dataset_id
-                    ).execute()
-                    
-                    points = data_response.get('point', [])
-                    source_info["points_found"] = len(points)
-                    
-                    # Get recent values
-                    recent_values = []
-                    for point in points[-10:]:  # Last 10 points
-                        point_time = datetime.fromtimestamp(int(point.get('startTimeNanos', 0)) / 1000000000)
-                        for value in point.get('value', []):
-                            if 'fpVal' in value:
-                                recent_values.append({
-                                    "time": point_time.isoformat(),
-                                    "value": round(value['fpVal'], 1),
-                                    "source": source_info["name"]
-                                })
-                            elif 'intVal' in value:
-                                recent_values.append({
-                                    "time": point_time.isoformat(),
-                                    "value": value['intVal'],
-                                    "source": source_info["name"]
-                                })
-                    
-                    results["heart_rate_data"].extend(recent_values)
-                    
-                except Exception as e:
-                    source_info["error"] = str(e)
+
+        # Last 7 days, as pure integer nanosecond arithmetic
+        now_ns = time.time_ns()
+        dataset_id = f"{now_ns - 7 * 86_400 * 10**9}-{now_ns}"
+
+        # One pass builds both the reported source info and the batch
+        # request map instead of re-walking the sources for each
+        source_infos = {}
+        requests_by_id = {}
+        for ds in hr_sources:
+            source_id = ds.get('dataStreamId', '')
+            source_info = {
+                "name": ds.get('dataStreamName', 'Unknown'),
+                "id": source_id,
+                "type": ds.get('type', ''),
+                "data_type": ds.get('dataType', {}).get('name', ''),
+                "application": ds.get('application', {}).get('packageName', 'Unknown')
+            }
+            results["heart_rate_sources"].append(source_info)
+            source_infos[source_id] = source_info
+            requests_by_id[source_id] = (source_id, dataset_id)
+
+        # One batched round trip for every source instead of a serial get each
+        responses, errors = await asyncio.to_thread(
+            _batch_dataset_gets, service, requests_by_id
+        )
+
+        for source_id, source_info in source_infos.items():
+            if source_id in errors:
+                source_info["error"] = str(errors[source_id])
+                continue
+
+            points = responses.get(source_id, {}).get('point', ())
+            source_info["points_found"] = len(points)
+
+            # Get recent values
+            recent_values = []
+            for point in points[-10:]:  # Last 10 points
+                point_time = datetime.fromtimestamp(int(point.get('startTimeNanos', 0)) / 1000000000)
+                for value in point.get('value', ()):
+                    if 'fpVal' in value:
+                        recent_values.append({
+                            "time": point_time.isoformat(),
+                            "value": round(value['fpVal'], 1),
+                            "source": source_info["name"]
+                        })
+                    elif 'intVal' in value:
+                        recent_values.append({
+                            "time": point_time.isoformat(),
+                            "value": value['intVal'],
+                            "source": source_info["name"]
+                        })
+
+            results["heart_rate_data"].extend(recent_values)
         
         # Sort by time (most recent first)
         results["heart_rate_data"].sort(key=lambda x: x["time"], reverse=True)
         
-        return JSONResponse(results)
+        return ORJSONResponse(results)
         
     except Exception as e:
-        return JSONResponse({"error": str(e)})
+        return ORJSONResponse({"error": str(e)})
 
 @app.get('/debug-heartrate')
 async def debug_heartrate(request: Request):
     """Debug endpoint to check available heart rate data"""
     
     if 'google_credentials' not in request.session:
-        return JSONResponse({"error": "Not authenticated with Google Fit"})
+        return ORJSONResponse({"error": "Not authenticated with Google Fit"})
     
     try:
-        credentials = Credentials(**request.session['google_credentials'])
-        service = build('fitness', 'v1', credentials=credentials)
+        credentials, service = get_fit_service(request)
         now = datetime.utcnow()
-        
-        # Try different time windows
-        time_windows = [
-            ("5 minutes", timedelta(minutes=5), 60000),      # 1-minute buckets
-            ("30 minutes", timedelta(minutes=30), 300000),   # 5-minute buckets  
-            ("24 hours", timedelta(hours=24), 3600000),      # 1-hour buckets
-            ("7 days", timedelta(days=7), 86400000)          # 1-day buckets
-        ]
-        
+
+        # The four windows are independent network calls - overlap them so
+        # the endpoint costs one round trip, not four stacked ones
+        now_ms = int(now.timestamp() * 1000)
+        buckets_per_window = await asyncio.gather(*(
+            fetch_aggregate_buckets(
+                service, "com.google.heart_rate.bpm",
+                int((now - time_delta).timestamp() * 1000), now_ms,
+                bucket_size
+            )
+            for _, time_delta, bucket_size in _HEARTRATE_WINDOWS
+        ))
+
         results = {}
-        
-        for window_name, time_delta, bucket_size in time_windows:
+
+        for (window_name, time_delta, _), buckets in zip(_HEARTRATE_WINDOWS, buckets_per_window):
             start_time = now - time_delta
-            
-            heart_rate_dataset = service.users().dataset().aggregate(
-                userId="me",
-                body={
-                    "aggregateBy": [{"dataTypeName": "com.google.heart_rate.bpm"}],
-                    "bucketByTime": {"durationMillis": bucket_size},
-                    "startTimeMillis": int(start_time.timestamp() * 1000),
-                    "endTimeMillis": int(now.timestamp() * 1000),
-                }
-            ).execute()
-            
-            hr_values = []
-            buckets = heart_rate_dataset.get('bucket', [])
-            
-            for bucket in buckets:
-                bucket_time = datetime.fromtimestamp(int(bucket['startTimeMillis']) / 1000)
-                for dataset in bucket.get('dataset', []):
-                    for point in dataset.get('point', []):
-                        for value in point.get('value', []):
-                            if 'fpVal' in value:
-                                hr_values.append({
-                                    "value": round(value['fpVal'], 1),
-                                    "time": bucket_time.isoformat()
-                                })
-            
+            # The 24-hour/7-day windows return enough buckets that the numpy
+            # path wins; short windows stay on the plain-Python extractor
+            extract = _extract_hr_points_np if len(buckets) > 64 else _extract_hr_points
+            times, values = extract(buckets)
+
             results[window_name] = {
-                "total_values": len(hr_values),
+                "total_values": len(values),
                 "buckets_found": len(buckets),
                 "time_range": f"{start_time.isoformat()} to {now.isoformat()}",
-                "values": hr_values[-5:] if hr_values else []  # Show last 5 values
+                # Only the last 5 shown values pay for dict construction
+                "values": [
+                    {"value": v, "time": t}
+                    for t, v in zip(times[-5:], values[-5:])
+                ]
             }
         
-        return JSONResponse(results)
+        return ORJSONResponse(results)
         
     except Exception as e:
-        return JSONResponse({"error": str(e)})
+        return ORJSONResponse({"error": str(e)})
 
 @app.get('/test-alerts')
-async def test_alerts_page(request: Request):
+def test_alerts_page(request: Request):
     """Test page for emergency alerts"""
     return templates.TemplateResponse("test_alerts.html", {
         "request": request,
@@ -1235,225 +1943,381 @@ async def quick_test_heart_rate(request: Request, heart_rate: int):
     }
     
     if spike_info['alert_needed']:
-        # Send emergency alerts
-        contacts = request.session.get('emergency_contacts', [])
+        # Send emergency alerts - bind the session list once; `or ()` skips
+        # allocating a default list when no contacts are stored
+        contacts = request.session.get('emergency_contacts') or ()
         if contacts:
+            n_contacts = len(contacts)
             send_emergency_alerts(request, spike_info, 'Test User')
-            response_data["emails_sent"] = len(contacts)
-            response_data["message"] = f"🚨 ALERT! Heart rate {heart_rate} BPM exceeds threshold {spike_info['threshold']} BPM. Emergency emails sent to {len(contacts)} contacts."
+            response_data["emails_sent"] = n_contacts
+            response_data["message"] = f"🚨 ALERT! Heart rate {heart_rate} BPM exceeds threshold {spike_info['threshold']} BPM. Emergency emails sent to {n_contacts} contacts."
         else:
             response_data["message"] = f"🚨 ALERT! Heart rate {heart_rate} BPM exceeds threshold {spike_info['threshold']} BPM. No emergency contacts configured."
     else:
         response_data["message"] = f"✅ Heart rate {heart_rate} BPM is within normal range (threshold: {spike_info['threshold']} BPM)."
     
-    return JSONResponse(response_data)
+    return ORJSONResponse(response_data)
+
+# Alert fan-out jobs dispatched from handlers that shouldn't block on SMTP.
+# Progress is polled via /email-status/{job_id}.
+_email_jobs = {}  # job_id -> {"status", "total", "sent", "failed", ...}
+
+def _run_alert_job(job_id: str, contacts: list, spike_info: dict, user_name: str):
+    """Background task: send one alert batch and record its outcome"""
+    job = _email_jobs[job_id]
+    job["status"] = "running"
+    try:
+        enabled_contacts = [c for c in contacts if c.get('notifications_enabled', True)]
+        results = alert_service.send_emergency_alert_batch(
+            emergency_contact_emails=[c['email'] for c in enabled_contacts],
+            user_name=user_name,
+            vital_type="Heart Rate",
+            vital_value=spike_info['heart_rate'],
+            threshold=spike_info['threshold']
+        )
+        job["sent"] = sum(1 for ok in results.values() if ok)
+        job["failed"] = len(results) - job["sent"]
+        job["status"] = "done"
+    except Exception as e:
+        job["status"] = "error"
+        job["error"] = str(e)
 
 @app.post('/simulate-emergency')
-async def simulate_emergency(request: Request, 
+async def simulate_emergency(request: Request,
+                           background_tasks: BackgroundTasks,
                            heart_rate: int = Form(...),
                            user_name: str = Form("Test User")):
     """Simulate an emergency for testing purposes"""
-    
+
     # Store user name in session
     request.session['user_name'] = user_name
-    
+
     # Check for spikes
     spike_info = check_vital_spikes([heart_rate], user_name)
-    
+
     if spike_info['alert_needed']:
-        # Send emergency alerts
-        send_emergency_alerts(request, spike_info, user_name)
-        
-        return JSONResponse({
+        # Hand the SMTP fan-out to a background job and answer right away;
+        # the caller polls /email-status/{job_id} for delivery progress
+        contacts = request.session.get('emergency_contacts', [])
+        job_id = uuid4().hex
+        if len(_email_jobs) > 256:
+            # Only drop finished jobs - clearing queued/running entries
+            # would KeyError the background task and lose the batch
+            for done_id in [jid for jid, j in _email_jobs.items()
+                            if j["status"] in ("done", "error")]:
+                del _email_jobs[done_id]
+        _email_jobs[job_id] = {"status": "queued", "total": len(contacts), "sent": 0, "failed": 0}
+        background_tasks.add_task(_run_alert_job, job_id, contacts, spike_info, user_name)
+
+        return ORJSONResponse({
             "success": True,
-            "message": f"Emergency simulation complete! HR: {heart_rate} BPM",
+            "message": f"Emergency simulation accepted! HR: {heart_rate} BPM - alerts dispatching",
             "spike_info": spike_info,
-            "contacts_notified": len(request.session.get('emergency_contacts', []))
-        })
+            "contacts_notified": len(contacts),
+            "job_id": job_id
+        }, status_code=202)
     else:
-        return JSONResponse({
+        return ORJSONResponse({
             "success": False,
             "message": f"Heart rate {heart_rate} BPM is within normal range",
             "spike_info": spike_info
         })
 
+@app.get('/email-status/{job_id}')
+def email_status(job_id: str):
+    """Report progress of a dispatched alert job"""
+    job = _email_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return ORJSONResponse({"job_id": job_id, **job})
+
 # =====================================================
 # 24/7 AUTOMATIC HEALTH MONITORING SYSTEM
 # =====================================================
 
+# The two heart rate streams the monitor reads, in preference order
+MONITOR_HR_SOURCE = "raw:com.google.heart_rate.bpm:com.noisefit:noise_activity - Heart data"
+MONITOR_FALLBACK_HR_SOURCE = "derived:com.google.heart_rate.bpm:com.google.android.gms:merge_heart_rate_bpm"
+
+# Cap concurrent per-user checks so a large user table can't stampede the
+# Fit API quota or the Mongo pool within one tick
+_monitor_check_sem = asyncio.Semaphore(16)
+
+# Adaptive polling: users with fresh data are checked every tick, users
+# whose device has gone quiet back off exponentially up to 30 minutes so
+# they stop burning Fit API quota for nothing
+MONITOR_BASE_POLL_S = 60
+MONITOR_MAX_POLL_S = 1800
+
+def _decode_hr_points(data: dict) -> list:
+    """Decode a raw dataset response into BPM values, most recent first"""
+    pts = [(int(point.get('startTimeNanos', 0)), round(value['fpVal'], 1))
+           for point in data.get('point', ())
+           for value in point.get('value', ())
+           if 'fpVal' in value]
+    pts.sort(key=lambda t: t[0], reverse=True)
+    return [bpm for _, bpm in pts]
+
+async def fetch_all_hr_batched(checks: list) -> dict:
+    """Fetch every monitored user's primary HR dataset in one round trip
+
+    checks is a list of (user, credentials, contacts) tuples. All the
+    per-user datasets().get calls ride a single multipart batch, so one
+    monitoring tick costs one TLS round trip instead of one per user.
+    Users whose sub-request failed are absent from the returned
+    {user_id: hr_values} mapping, which sends the caller down the
+    per-user fallback path.
+    """
+    if not checks:
+        return {}
+    now_ns = time.time_ns()
+    dataset_id = f"{now_ns - 24 * 3_600 * 10**9}-{now_ns}"
+
+    def _run_batch():
+        responses = {}
+        errors = {}
+
+        def _collect(request_id, response, exception):
+            if exception is not None:
+                errors[request_id] = exception
+            else:
+                responses[request_id] = response
+
+        batch = None
+        batch_http = None
+        for user, credentials, _ in checks:
+            service = get_fitness_service(credentials)
+            if batch is None:
+                batch = service.new_batch_http_request(callback=_collect)
+                batch_http = _fresh_http(service._http)
+            batch.add(
+                service.users().dataSources().datasets().get(
+                    userId="me",
+                    dataSourceId=MONITOR_HR_SOURCE,
+                    datasetId=dataset_id
+                ),
+                request_id=str(user['_id'])
+            )
+        batch.execute(http=batch_http)
+        return responses, errors
+
+    responses, errors = await asyncio.to_thread(_run_batch)
+    for request_id, exc in errors.items():
+        logger.error("❌ Batched HR fetch failed for user %s: %s", request_id, exc)
+    return {request_id: _decode_hr_points(response)
+            for request_id, response in responses.items()}
+
 async def continuous_health_monitoring():
     """24/7 Background health monitoring - runs automatically"""
     global global_monitoring_active
     
-    print("🏥 Starting 24/7 Automatic Health Monitoring System...")
+    logger.info("🏥 Starting 24/7 Automatic Health Monitoring System...")
     global_monitoring_active = True
     
     # Get Gemini API key from environment
     gemini_api_key = os.getenv('GEMINI_API_KEY')
     if gemini_api_key:
-        print("🧠 Gemini AI Integration: ENABLED")
+        logger.info("🧠 Gemini AI Integration: ENABLED")
     else:
-        print("⚠️ Gemini AI Integration: DISABLED (no API key found)")
+        logger.warning("⚠️ Gemini AI Integration: DISABLED (no API key found)")
     
     while global_monitoring_active:
         try:
             # Get all monitored users from database
             monitored_users = await UserModel.get_all_monitored_users()
-            
+
             if monitored_users:
-                print(f"🔍 Checking health for {len(monitored_users)} registered users...")
-                
-                # Check each registered user
-                for user in monitored_users:
-                    try:
-                        # Get user's emergency contacts
-                        emergency_contacts = await EmergencyContactModel.get_user_contacts(user['_id'])
-                        
-                        if emergency_contacts:
-                            # Reconstruct credentials from stored data
-                            credentials_data = user.get('google_credentials', {})
-                            if credentials_data:
-                                credentials = Credentials(
-                                    token=credentials_data.get('token'),
-                                    refresh_token=credentials_data.get('refresh_token'),
-                                    token_uri=credentials_data.get('token_uri'),
-                                    client_id=credentials_data.get('client_id'),
-                                    client_secret=credentials_data.get('client_secret'),
-                                    scopes=credentials_data.get('scopes')
-                                )
-                                
-                                await check_user_health_automatically_db(
-                                    user=user,
-                                    credentials=credentials,
-                                    emergency_contacts=emergency_contacts
+                # One timestamp for the whole tick instead of one syscall per user
+                tick_time = datetime.now()
+
+                # Only users whose adaptive interval has elapsed are checked
+                # this tick; the rest keep their next_check_at untouched
+                due_users = [
+                    user for user in monitored_users
+                    if user.get('next_check_at') is None or user['next_check_at'] <= tick_time
+                ]
+                logger.debug("🔍 Checking health for %s of %s registered users...",
+                             len(due_users), len(monitored_users))
+
+                # Pull every user's contacts concurrently - independent reads
+                contacts_per_user = await asyncio.gather(*(
+                    EmergencyContactModel.get_user_contacts(user['_id'])
+                    for user in due_users
+                ), return_exceptions=True)
+
+                checks = []
+                for user, emergency_contacts in zip(due_users, contacts_per_user):
+                    user_email = user.get('email', 'unknown')
+                    if isinstance(emergency_contacts, Exception):
+                        logger.error("❌ Error loading contacts for %s: %s", user_email, emergency_contacts)
+                        continue
+                    if not emergency_contacts:
+                        logger.warning("⚠️ No emergency contacts for user: %s", user_email)
+                        continue
+                    # Reconstruct credentials from stored data
+                    credentials_data = user.get('google_credentials', {})
+                    if not credentials_data:
+                        continue
+                    credentials = Credentials(
+                        token=credentials_data.get('token'),
+                        refresh_token=credentials_data.get('refresh_token'),
+                        token_uri=credentials_data.get('token_uri'),
+                        client_id=credentials_data.get('client_id'),
+                        client_secret=credentials_data.get('client_secret'),
+                        scopes=credentials_data.get('scopes')
+                    )
+                    checks.append((user, credentials, emergency_contacts))
+
+                # One multipart batch fetches every user's primary HR stream
+                hr_by_user = await fetch_all_hr_batched(checks)
+
+                # Evaluate all users concurrently; the semaphore keeps the
+                # fallback fetches and alert fan-outs to a bounded width and
+                # each user's errors stay confined to their own task
+                async def _check_one(user, credentials, emergency_contacts):
+                    async with _monitor_check_sem:
+                        try:
+                            data_found = await check_user_health_automatically_db(
+                                user=user,
+                                credentials=credentials,
+                                emergency_contacts=emergency_contacts,
+                                prefetched_hr=hr_by_user.get(str(user['_id']))
+                            )
+
+                            # Fresh data resets the interval; a silent device
+                            # doubles it up to the cap
+                            if data_found:
+                                interval = MONITOR_BASE_POLL_S
+                            else:
+                                interval = min(
+                                    user.get('poll_interval_s', MONITOR_BASE_POLL_S) * 2,
+                                    MONITOR_MAX_POLL_S
                                 )
-                                
-                                # Update last check time
-                                await UserModel.update_user(user['_id'], {
-                                    'last_health_check': datetime.now()
-                                })
-                        else:
-                            print(f"⚠️ No emergency contacts for user: {user['email']}")
-                            
-                    except Exception as e:
-                        print(f"❌ Error checking {user['email']}: {e}")
+
+                            # Update last check time and the adaptive schedule
+                            await UserModel.update_user(user['_id'], {
+                                'last_health_check': tick_time,
+                                'poll_interval_s': interval,
+                                'next_check_at': tick_time + timedelta(seconds=interval)
+                            })
+                        except Exception as e:
+                            logger.error("❌ Error checking %s: %s", user.get('email', 'unknown'), e)
+
+                await asyncio.gather(*(_check_one(*check) for check in checks))
             else:
-                print("📝 No users registered for monitoring yet")
+                logger.info("📝 No users registered for monitoring yet")
             
             await asyncio.sleep(60)  # Check every 1 minute
             
         except Exception as e:
-            print(f"❌ Error in continuous monitoring: {e}")
+            logger.error("❌ Error in continuous monitoring: %s", e)
             await asyncio.sleep(30)  # Wait before retrying
 
-async def check_user_health_automatically_db(user: dict, credentials, emergency_contacts: list):
-    """Check a specific user's health data automatically using database storage"""
+async def check_user_health_automatically_db(user: dict, credentials, emergency_contacts: list,
+                                             prefetched_hr: list = None):
+    """Check a specific user's health data automatically using database storage
+
+    prefetched_hr carries the values from the monitoring tick's batched
+    fetch; when it is None (standalone call or failed sub-request) the
+    per-user fetch with its merged-source fallback runs instead.
+
+    Returns True when heart rate data was found, so the monitoring loop
+    can adapt each user's polling interval.
+    """
+    user_name = user.get('name', 'User')
     try:
-        service = build('fitness', 'v1', credentials=credentials)
+        service = get_fitness_service(credentials)
+        # One clock read per check - every later timestamp in this pass
+        # (cooldown guard, alert bookkeeping) reuses these
         now = datetime.utcnow()
+        local_now = datetime.now()
         start_time = now - timedelta(hours=24)  # Use 24-hour window to catch recent data
-        
-        print(f"🔍 Debug: Fetching heart rate data for {user['name']}")
-        print(f"🔍 Debug: Time range: {start_time} to {now}")
-        
-        hr_values = []
-        
-        # Directly query the NoiseColorFit raw data source (we know this works from debug data)
-        try:
+
+        logger.debug("🔍 Debug: Fetching heart rate data for %s", user_name)
+        logger.debug("🔍 Debug: Time range: %s to %s", start_time, now)
+
+        if prefetched_hr is not None:
+            hr_values = prefetched_hr
+        else:
+            hr_values = []
+
+            # Directly query the NoiseColorFit raw data source (we know this works from debug data)
             dataset_id = f"{int(start_time.timestamp() * 1000000000)}-{int(now.timestamp() * 1000000000)}"
-            
-            print(f"🔍 Debug: Querying NoiseColorFit raw data for last 24 hours...")
-            
-            noisefit_data = service.users().dataSources().datasets().get(
-                userId="me",
-                dataSourceId="raw:com.google.heart_rate.bpm:com.noisefit:noise_activity - Heart data",
-                datasetId=dataset_id
-            ).execute()
-            
-            points = noisefit_data.get('point', [])
-            print(f"🔍 Debug: NoiseColorFit raw data returned {len(points)} points")
-            
-            # Sort points by time (most recent first)
-            points.sort(key=lambda p: int(p.get('startTimeNanos', 0)), reverse=True)
-            
-            for point in points:
-                point_time = datetime.fromtimestamp(int(point.get('startTimeNanos', 0)) / 1000000000)
-                for value in point.get('value', []):
-                    if 'fpVal' in value:
-                        hr_value = round(value['fpVal'], 1)
-                        hr_values.append(hr_value)
-                        print(f"🔍 Debug: Found HR {hr_value} BPM at {point_time} from NoiseColorFit")
-            
-            if hr_values:
-                print(f"✅ Successfully found {len(hr_values)} heart rate values from NoiseColorFit")
-                
-        except Exception as e:
-            print(f"❌ Error querying NoiseColorFit: {e}")
-            
-            # Fallback to merged data source
             try:
-                dataset_id = f"{int(start_time.timestamp() * 1000000000)}-{int(now.timestamp() * 1000000000)}"
-                
-                merged_data = service.users().dataSources().datasets().get(
-                    userId="me",
-                    dataSourceId="derived:com.google.heart_rate.bpm:com.google.android.gms:merge_heart_rate_bpm",
-                    datasetId=dataset_id
-                ).execute()
-                
-                points = merged_data.get('point', [])
-                points.sort(key=lambda p: int(p.get('startTimeNanos', 0)), reverse=True)
-                
-                for point in points:
-                    point_time = datetime.fromtimestamp(int(point.get('startTimeNanos', 0)) / 1000000000)
-                    for value in point.get('value', []):
-                        if 'fpVal' in value:
-                            hr_value = round(value['fpVal'], 1)
-                            hr_values.append(hr_value)
-                            print(f"🔍 Debug: Found HR {hr_value} BPM at {point_time} from merged data")
-                
-            except Exception as e2:
-                print(f"❌ Error querying merged data: {e2}")
-        
+                logger.debug("🔍 Debug: Querying NoiseColorFit raw data for last 24 hours...")
+
+                noisefit_data = await fetch_dataset(
+                    service, credentials, MONITOR_HR_SOURCE, dataset_id
+                )
+                hr_values = _decode_hr_points(noisefit_data)
+
+                if hr_values:
+                    logger.info("✅ Successfully found %s heart rate values from NoiseColorFit", len(hr_values))
+
+            except Exception as e:
+                logger.error("❌ Error querying NoiseColorFit: %s", e)
+
+                # Fallback to merged data source
+                try:
+                    merged_data = await fetch_dataset(
+                        service, credentials, MONITOR_FALLBACK_HR_SOURCE, dataset_id
+                    )
+                    hr_values = _decode_hr_points(merged_data)
+
+                except Exception as e2:
+                    logger.error("❌ Error querying merged data: %s", e2)
+
         # Process the heart rate data if we found any
         if hr_values:
             # Use the most recent reading (first in sorted list)
             latest_hr = hr_values[0]
-            print(f"🔍 Debug: Processing {len(hr_values)} heart rate values")
-            print(f"🔍 Debug: Latest HR: {latest_hr} BPM")
-            print(f"🔍 Debug: User data: {user}")
+            logger.debug("🔍 Debug: Processing %s heart rate values, latest %s BPM", len(hr_values), latest_hr)
+            logger.debug("User data: %s", user)
             
             # Use user's custom thresholds from database
-            spike_info = check_vital_spikes_custom([latest_hr], user['name'], user)
-            print(f"🔍 Debug: Spike info result: {spike_info}")
-            
+            spike_info = check_vital_spikes_custom([latest_hr], user_name, user)
+            logger.debug("🔍 Debug: Spike info result: %s", spike_info)
+
             if spike_info['alert_needed']:
-                print(f"🚨 EMERGENCY DETECTED for {user['name']}!")
-                print(f"Heart Rate: {spike_info['heart_rate']} BPM (Threshold: {spike_info['threshold']})")
+                # Skip re-alerting if contacts were already notified within the
+                # cooldown window. Stored on the user document, so the guard
+                # holds across process restarts mid-fan-out.
+                last_alert_at = user.get('last_alert_at')
+                if last_alert_at and (local_now - last_alert_at).total_seconds() < ALERT_COOLDOWN_SECONDS:
+                    logger.info("⏳ Alert suppressed for %s - contacts already notified in the last %s minutes", user_name, ALERT_COOLDOWN_SECONDS // 60)
+                    return True
+
+                logger.info("🚨 EMERGENCY DETECTED for %s!", user_name)
+                logger.info("Heart Rate: %s BPM (Threshold: %s)", spike_info['heart_rate'], spike_info['threshold'])
                 
-                # Send emergency alerts to all contacts
+                # Send emergency alerts to all contacts over one SMTP session
+                enabled_contacts = [c for c in emergency_contacts if c.get('notifications_enabled', True)]
+                await smtp_rate_limiter.acquire(len(enabled_contacts))
+                # The batch holds a blocking SMTP session; run it on a worker
+                # thread so the monitoring loop keeps serving other users
+                results = await asyncio.to_thread(
+                    alert_service.send_emergency_alert_batch,
+                    emergency_contact_emails=[c['email'] for c in enabled_contacts],
+                    user_name=user_name,
+                    vital_type="Heart Rate",
+                    vital_value=spike_info['heart_rate'],
+                    threshold=spike_info['threshold']
+                )
+
                 alert_count = 0
                 contacts_notified = []
+
+                for contact in enabled_contacts:
+                    contact_name = contact['name']
+                    contact_email = contact['email']
+                    if results.get(contact_email):
+                        alert_count += 1
+                        contacts_notified.append(contact_email)
+                        logger.info("✅ EMERGENCY ALERT sent to %s (%s)", contact_name, contact_email)
+                    else:
+                        logger.error("❌ Failed to send alert to %s", contact_name)
                 
-                for contact in emergency_contacts:
-                    if contact.get('notifications_enabled', True):
-                        try:
-                            success = send_heart_rate_alert(
-                                emergency_email=contact['email'],
-                                user_name=user['name'],
-                                heart_rate=spike_info['heart_rate'],
-                                threshold=spike_info['threshold']
-                            )
-                            
-                            if success:
-                                alert_count += 1
-                                contacts_notified.append(contact['email'])
-                                print(f"✅ EMERGENCY ALERT sent to {contact['name']} ({contact['email']})")
-                            else:
-                                print(f"❌ Failed to send alert to {contact['name']}")
-                        except Exception as e:
-                            print(f"❌ Error sending alert to {contact['name']}: {e}")
-                
-                print(f"📧 Emergency alerts sent to {alert_count}/{len(emergency_contacts)} contacts")
+                logger.info("📧 Emergency alerts sent to %s/%s contacts", alert_count, len(emergency_contacts))
                 
                 # Store alert in database
                 alert_data = {
@@ -1466,19 +2330,26 @@ async def check_user_health_automatically_db(user: dict, credentials, emergency_
                     "contacts_notified": contacts_notified
                 }
                 await HealthAlertModel.create_alert(alert_data)
-                
+
+                # Record the alert time so subsequent ticks honour the cooldown
+                if alert_count > 0:
+                    await UserModel.update_user(user['_id'], {'last_alert_at': local_now})
+
                 # Use Gemini AI for analysis if available
                 gemini_api_key = os.getenv('GEMINI_API_KEY')
                 if gemini_api_key:
-                    print(f"🧠 Analyzing health pattern with Gemini AI...")
+                    logger.info("🧠 Analyzing health pattern with Gemini AI...")
                     # Add AI analysis here if needed
             else:
-                print(f"✅ Health check OK for {user['name']} - HR: {latest_hr} BPM (No alert needed)")
+                logger.info("✅ Health check OK for %s - HR: %s BPM (No alert needed)", user_name, latest_hr)
         else:
-            print(f"⚠️ No heart rate data found for {user['name']} in the last 24 hours")
-    
+            logger.warning("⚠️ No heart rate data found for %s in the last 24 hours", user_name)
+
+        return bool(hr_values)
+
     except Exception as e:
-        print(f"❌ Error checking health for {user['name']}: {e}")
+        logger.error("❌ Error checking health for %s: %s", user_name, e)
+        return False
 
 def check_vital_spikes_custom(hr_values: list, user_name: str = "User", health_prefs: dict = None):
     """
@@ -1502,10 +2373,11 @@ def check_vital_spikes_custom(hr_values: list, user_name: str = "User", health_p
         LOW_HR_WARNING = 60    
         LOW_HR_CRITICAL = 60   
     
-    print(f"🔍 Debug Thresholds - HIGH_WARNING: {HIGH_HR_WARNING}, HIGH_CRITICAL: {HIGH_HR_CRITICAL}, LOW_WARNING: {LOW_HR_WARNING}, LOW_CRITICAL: {LOW_HR_CRITICAL}")
+    logger.debug("Thresholds - HIGH_WARNING: %s, HIGH_CRITICAL: %s, LOW_WARNING: %s, LOW_CRITICAL: %s",
+                 HIGH_HR_WARNING, HIGH_HR_CRITICAL, LOW_HR_WARNING, LOW_HR_CRITICAL)
     
     latest_hr = hr_values[-1] if hr_values else 0
-    print(f"🔍 Debug: Checking HR {latest_hr} against thresholds")
+    logger.debug("Checking HR %s against thresholds", latest_hr)
     
     # Check for dangerous heart rate
     alert_needed = False
@@ -1516,22 +2388,22 @@ def check_vital_spikes_custom(hr_values: list, user_name: str = "User", health_p
         alert_needed = True
         threshold = HIGH_HR_CRITICAL
         severity = "CRITICAL"
-        print(f"🚨 CRITICAL: Heart rate {latest_hr} exceeds critical threshold!")
+        logger.info("🚨 CRITICAL: Heart rate %s exceeds critical threshold!", latest_hr)
     elif latest_hr >= HIGH_HR_WARNING:
         alert_needed = True
         threshold = HIGH_HR_WARNING
         severity = "WARNING"
-        print(f"⚠️ WARNING: Heart rate {latest_hr} exceeds warning threshold!")
+        logger.warning("⚠️ WARNING: Heart rate %s exceeds warning threshold!", latest_hr)
     elif latest_hr <= LOW_HR_CRITICAL and latest_hr > 0:
         alert_needed = True
         threshold = LOW_HR_CRITICAL
         severity = "CRITICAL"
-        print(f"🚨 CRITICAL: Heart rate {latest_hr} below critical threshold!")
+        logger.info("🚨 CRITICAL: Heart rate %s below critical threshold!", latest_hr)
     elif latest_hr <= LOW_HR_WARNING and latest_hr > 0:
         alert_needed = True
         threshold = LOW_HR_WARNING
         severity = "WARNING"
-        print(f"⚠️ WARNING: Heart rate {latest_hr} below warning threshold!")
+        logger.warning("⚠️ WARNING: Heart rate %s below warning threshold!", latest_hr)
     
     return {
         "alert_needed": alert_needed,
@@ -1543,12 +2415,12 @@ def check_vital_spikes_custom(hr_values: list, user_name: str = "User", health_p
 async def check_user_health_automatically(credentials, emergency_contacts, user_name):
     """Check a specific user's health data automatically"""
     try:
-        service = build('fitness', 'v1', credentials=credentials)
+        service = get_fitness_service(credentials)
         now = datetime.utcnow()
         start_time = now - timedelta(minutes=5)  # Check last 5 minutes
         
         # Fetch recent heart rate data
-        heart_rate_dataset = service.users().dataset().aggregate(
+        heart_rate_dataset = await execute_api_request(service.users().dataset().aggregate(
             userId="me",
             body={
                 "aggregateBy": [{"dataTypeName": "com.google.heart_rate.bpm"}],
@@ -1556,16 +2428,16 @@ async def check_user_health_automatically(credentials, emergency_contacts, user_
                 "startTimeMillis": int(start_time.timestamp() * 1000),
                 "endTimeMillis": int(now.timestamp() * 1000),
             }
-        ).execute()
+        ))
         
         # Process heart rate data
         hr_values = []
-        heart_rate_data = heart_rate_dataset.get('bucket', [])
+        heart_rate_data = heart_rate_dataset.get('bucket', ())
         
         for bucket in heart_rate_data:
-            for dataset in bucket.get('dataset', []):
-                for point in dataset.get('point', []):
-                    for value in point.get('value', []):
+            for dataset in bucket.get('dataset', ()):
+                for point in dataset.get('point', ()):
+                    for value in point.get('value', ()):
                         if 'fpVal' in value:
                             hr_values.append(round(value['fpVal'], 1))
         
@@ -1574,41 +2446,45 @@ async def check_user_health_automatically(credentials, emergency_contacts, user_
             spike_info = check_vital_spikes(hr_values, user_name)
             
             if spike_info['alert_needed']:
-                print(f"🚨 EMERGENCY DETECTED for {user_name}!")
-                print(f"Heart Rate: {spike_info['heart_rate']} BPM (Threshold: {spike_info['threshold']})")
+                logger.info("🚨 EMERGENCY DETECTED for %s!", user_name)
+                logger.info("Heart Rate: %s BPM (Threshold: %s)", spike_info['heart_rate'], spike_info['threshold'])
                 
-                # Send emergency alerts to all contacts
+                # Send emergency alerts to all contacts over one SMTP session
+                enabled_contacts = [c for c in emergency_contacts if c.get('notifications_enabled', True)]
+                await smtp_rate_limiter.acquire(len(enabled_contacts))
+                # The batch holds a blocking SMTP session; run it on a worker
+                # thread so the monitoring loop keeps serving other users
+                results = await asyncio.to_thread(
+                    alert_service.send_emergency_alert_batch,
+                    emergency_contact_emails=[c['email'] for c in enabled_contacts],
+                    user_name=user_name,
+                    vital_type="Heart Rate",
+                    vital_value=spike_info['heart_rate'],
+                    threshold=spike_info['threshold']
+                )
+
                 alert_count = 0
-                for contact in emergency_contacts:
-                    if contact.get('notifications_enabled', True):
-                        try:
-                            success = send_heart_rate_alert(
-                                emergency_email=contact['email'],
-                                user_name=user_name,
-                                heart_rate=spike_info['heart_rate'],
-                                threshold=spike_info['threshold']
-                            )
-                            
-                            if success:
-                                alert_count += 1
-                                print(f"✅ EMERGENCY ALERT sent to {contact['name']} ({contact['email']})")
-                            else:
-                                print(f"❌ Failed to send alert to {contact['name']}")
-                        except Exception as e:
-                            print(f"❌ Error sending alert to {contact['name']}: {e}")
+                for contact in enabled_contacts:
+                    contact_name = contact['name']
+                    contact_email = contact['email']
+                    if results.get(contact_email):
+                        alert_count += 1
+                        logger.info("✅ EMERGENCY ALERT sent to %s (%s)", contact_name, contact_email)
+                    else:
+                        logger.error("❌ Failed to send alert to %s", contact_name)
                 
-                print(f"📧 Emergency alerts sent to {alert_count}/{len(emergency_contacts)} contacts")
+                logger.info("📧 Emergency alerts sent to %s/%s contacts", alert_count, len(emergency_contacts))
                 
                 # Use Gemini AI for analysis if available
                 gemini_api_key = os.getenv('GEMINI_API_KEY')
                 if gemini_api_key:
-                    print(f"🧠 Analyzing health pattern with Gemini AI...")
+                    logger.info("🧠 Analyzing health pattern with Gemini AI...")
                     # Add AI analysis here if needed
             else:
-                print(f"✅ Health check OK for {user_name} - HR: {hr_values[-1]} BPM")
+                logger.info("✅ Health check OK for %s - HR: %s BPM", user_name, hr_values[-1])
     
     except Exception as e:
-        print(f"❌ Error checking health for {user_name}: {e}")
+        logger.error("❌ Error checking health for %s: %s", user_name, e)
 
 @app.on_event("startup")
 async def startup_event():
@@ -1672,7 +2548,7 @@ async def monitoring_dashboard(request: Request):
         total_monitored_users = len(all_monitored)
         
     except Exception as e:
-        print(f"❌ Error fetching monitoring dashboard data: {e}")
+        logger.error("❌ Error fetching monitoring dashboard data: %s", e)
     
     return templates.TemplateResponse("monitoring_dashboard.html", {
         "request": request,
@@ -1693,7 +2569,7 @@ async def register_monitoring(request: Request):
     
     # Check if user is authenticated
     if 'google_credentials' not in request.session:
-        return JSONResponse({
+        return ORJSONResponse({
             "success": False,
             "message": "Please login with Google Fit first"
         })
@@ -1701,14 +2577,15 @@ async def register_monitoring(request: Request):
     # Check if user has emergency contacts
     emergency_contacts = request.session.get('emergency_contacts', [])
     if not emergency_contacts:
-        return JSONResponse({
+        return ORJSONResponse({
             "success": False,
             "message": "Please add at least one emergency contact to enable monitoring"
         })
     
     # User is already registered through the vitals endpoint
-    if user_email in monitored_users:
-        return JSONResponse({
+    existing_user = await UserModel.get_user_by_email(user_email)
+    if existing_user and existing_user.get('monitoring_enabled'):
+        return ORJSONResponse({
             "success": True,
             "message": f"✅ You are already registered for 24/7 automatic health monitoring!",
             "details": {
@@ -1718,7 +2595,7 @@ async def register_monitoring(request: Request):
             }
         })
     else:
-        return JSONResponse({
+        return ORJSONResponse({
             "success": False,
             "message": "Visit your vitals page to automatically register for monitoring"
         })
@@ -1729,28 +2606,39 @@ async def stop_monitoring(request: Request):
     user_email = request.session.get('user_email', 'Unknown User')
     
     # Remove user from monitoring
-    if user_email in monitored_users:
-        del monitored_users[user_email]
-        return JSONResponse({
+    existing_user = await UserModel.get_user_by_email(user_email)
+    if existing_user and existing_user.get('monitoring_enabled'):
+        await UserModel.update_user(existing_user['_id'], {'monitoring_enabled': False})
+        return ORJSONResponse({
             "success": True,
             "message": "🛑 Removed from 24/7 monitoring successfully"
         })
     else:
-        return JSONResponse({
+        return ORJSONResponse({
             "success": False,
             "message": "User was not being monitored"
         })
 
-@app.get('/monitoring-status')
-async def monitoring_status(request: Request):
-    """Get 24/7 monitoring status"""
-    
-    user_email = request.session.get('user_email', 'Unknown User')
-    user_registered = False
-    total_contacts = 0
-    total_monitored_users = 0
-    
+# Dashboard polls /monitoring-status repeatedly; the three DB counts it
+# shows change rarely, so a short TTL keeps polling off the database.
+# Concurrent cache misses for the same user additionally coalesce onto one
+# in-flight future (singleflight) so a poll burst runs the queries once.
+_monitoring_status_cache = {}  # user_email -> (expires_at, (registered, contacts, monitored))
+_monitoring_status_inflight = {}  # user_email -> asyncio.Future
+MONITORING_STATUS_TTL = 30  # seconds
+
+async def _monitoring_status_counts(user_email: str) -> tuple:
+    """Fetch (registered, contacts, monitored) once per burst of pollers"""
+    inflight = _monitoring_status_inflight.get(user_email)
+    if inflight is not None:
+        return await asyncio.shield(inflight)
+
+    future = asyncio.get_running_loop().create_future()
+    _monitoring_status_inflight[user_email] = future
     try:
+        user_registered = False
+        total_contacts = 0
+
         # Check if user exists in database
         existing_user = await UserModel.get_user_by_email(user_email)
         if existing_user:
@@ -1758,15 +2646,44 @@ async def monitoring_status(request: Request):
             # Get user's emergency contacts count
             emergency_contacts = await EmergencyContactModel.get_user_contacts(existing_user['_id'])
             total_contacts = len(emergency_contacts)
-        
+
         # Get total monitored users from database
         all_monitored = await UserModel.get_all_monitored_users()
-        total_monitored_users = len(all_monitored)
-        
+        counts = (user_registered, total_contacts, len(all_monitored))
+
+        if len(_monitoring_status_cache) > 1024:
+            _monitoring_status_cache.clear()
+        _monitoring_status_cache[user_email] = (time.time() + MONITORING_STATUS_TTL, counts)
+
+        future.set_result(counts)
+        return counts
     except Exception as e:
-        print(f"❌ Error fetching monitoring status: {e}")
-    
-    return JSONResponse({
+        future.set_exception(e)
+        future.exception()  # mark retrieved even if no waiter ever awaits it
+        raise
+    finally:
+        _monitoring_status_inflight.pop(user_email, None)
+
+@app.get('/monitoring-status')
+async def monitoring_status(request: Request):
+    """Get 24/7 monitoring status"""
+
+    user_email = request.session.get('user_email', 'Unknown User')
+    user_registered = False
+    total_contacts = 0
+    total_monitored_users = 0
+
+    cached = _monitoring_status_cache.get(user_email)
+    if cached and time.time() < cached[0]:
+        user_registered, total_contacts, total_monitored_users = cached[1]
+    else:
+        try:
+            user_registered, total_contacts, total_monitored_users = \
+                await _monitoring_status_counts(user_email)
+        except Exception as e:
+            logger.error("❌ Error fetching monitoring status: %s", e)
+
+    return ORJSONResponse({
         "system_active": global_monitoring_active,
         "user_registered": user_registered,
         "user_email": user_email,
@@ -1785,7 +2702,7 @@ async def update_monitoring_settings(request: Request,
         # Update check interval (minimum 1 minute, maximum 1 hour)
         check_interval = max(60, min(3600, check_interval))
         
-        return JSONResponse({
+        return ORJSONResponse({
             "success": True,
             "message": "24/7 monitoring settings updated successfully",
             "settings": {
@@ -1796,7 +2713,7 @@ async def update_monitoring_settings(request: Request,
         })
         
     except Exception as e:
-        return JSONResponse({
+        return ORJSONResponse({
             "success": False,
             "message": f"Failed to update settings: {str(e)}"
         })
